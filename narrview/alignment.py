@@ -0,0 +1,153 @@
+import mmap
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from narrview.store import AnnotationStore, default_store, file_signature, text_path
+
+
+whitespace = re.compile(r'\s+')
+
+# path -> (file signature, SourceText) of the most recently used plain texts
+source_texts = OrderedDict()
+source_texts_maxsize = 32
+source_texts_lock = threading.Lock()
+
+
+class SourceText:
+    def __init__(self, path: str, checkpoint_interval: int = 64):
+        """Memory-mapped UTF-8 plain text addressed by the character offsets used in the annotations.
+
+        The byte offset of every `checkpoint_interval`-th character is kept, so that slicing decodes at most
+        `checkpoint_interval` characters beyond the requested span.
+
+        Args:
+            path (str): Path of the text file.
+            checkpoint_interval (int, optional): Characters between two byte offset checkpoints. Defaults to 64.
+        """
+        self.path = path
+        self.checkpoint_interval = checkpoint_interval
+        with open(path, 'rb') as text_file:
+            self._map = mmap.mmap(text_file.fileno(), 0, access=mmap.ACCESS_READ)
+        data = np.frombuffer(self._map, dtype=np.uint8)
+        char_starts = np.flatnonzero((data & 0xC0) != 0x80)     # skips UTF-8 continuation bytes
+        self.length = len(char_starts)
+        self.checkpoints = char_starts[::checkpoint_interval].copy()
+        del data, char_starts
+
+    def __len__(self) -> int:
+        return self.length
+
+    def byte_offset(self, char_offset: int) -> int:
+        char_offset = min(max(int(char_offset), 0), self.length)
+        if char_offset == self.length:
+            return len(self._map)
+        position = int(self.checkpoints[char_offset // self.checkpoint_interval])
+        for _ in range(char_offset % self.checkpoint_interval):
+            lead = self._map[position]
+            position += 1 if lead < 0x80 else 2 if lead < 0xE0 else 3 if lead < 0xF0 else 4
+        return position
+
+    def slice(self, start_point: int, end_point: int) -> str:
+        """Returns the text between two character offsets.
+        """
+        return self._map[self.byte_offset(start_point):self.byte_offset(end_point)].decode('utf-8')
+
+    def context(self, start_point: int, end_point: int, width: int = 50) -> tuple:
+        """Returns the left and right context of a span.
+        """
+        return (
+            self.slice(start_point - width, start_point),
+            self.slice(end_point, end_point + width)
+        )
+
+    def close(self) -> None:
+        self._map.close()
+
+
+def source_text(text: str, root: str = '.') -> SourceText:
+    """Returns the memory-mapped plain text of a text, shared between calls as long as the modification time and the
+    size of the file are unchanged. A changed file is mapped again instead of reading a stale or truncated mapping.
+    """
+    path = text_path(text=text, root=root)
+    signature = file_signature(path)
+    with source_texts_lock:
+        cached = source_texts.get(path)
+        if cached is not None and cached[0] == signature:
+            source_texts.move_to_end(path)
+            return cached[1]
+
+    source = SourceText(path)
+    with source_texts_lock:
+        source_texts[path] = (signature, source)
+        source_texts.move_to_end(path)
+        while len(source_texts) > source_texts_maxsize:
+            source_texts.popitem(last=False)
+    return source
+
+
+def add_context(annotation_df: pd.DataFrame, text: str, width: int = 50, root: str = '.') -> pd.DataFrame:
+    """Rebuilds 'left_context' and 'right_context' from the plain text, e.g. for annotations loaded
+    with `AnnotationStore(contexts=False)`. With the default width they equal the stored contexts.
+
+    Args:
+        annotation_df (pd.DataFrame): Annotations of the text.
+        text (str): The texts short title.
+        width (int, optional): Number of characters on each side. Defaults to 50.
+        root (str, optional): The repository root. Defaults to '.'.
+
+    Returns:
+        pd.DataFrame: Copy of the annotations with context columns.
+    """
+    source = source_text(text=text, root=root)
+    contexts = [
+        source.context(start_point, end_point, width=width)
+        for start_point, end_point in zip(annotation_df.start_point, annotation_df.end_point)
+    ]
+    annotation_df = annotation_df.copy()
+    annotation_df['left_context'] = [left for left, _ in contexts]
+    annotation_df['right_context'] = [right for _, right in contexts]
+    return annotation_df
+
+
+def validate_alignment(annotation_df: pd.DataFrame, text: str, root: str = '.') -> pd.Series:
+    """Compares the annotation strings with the plain text at their offsets.
+
+    Args:
+        annotation_df (pd.DataFrame): Annotations of the text with an 'annotation' column.
+        text (str): The texts short title.
+        root (str, optional): The repository root. Defaults to '.'.
+
+    Returns:
+        pd.Series: Per annotation 'exact' if the strings are equal, 'whitespace' if they only differ in whitespace,
+            otherwise 'mismatch' (e.g. annotations of discontinuous text spans).
+    """
+    source = source_text(text=text, root=root)
+    status = []
+    for annotation, start_point, end_point in zip(
+            annotation_df.annotation, annotation_df.start_point, annotation_df.end_point):
+        span = source.slice(start_point, end_point)
+        if span == annotation:
+            status.append('exact')
+        elif whitespace.sub(' ', span).strip() == whitespace.sub(' ', annotation).strip():
+            status.append('whitespace')
+        else:
+            status.append('mismatch')
+    return pd.Series(status, index=annotation_df.index, name='alignment')
+
+
+def alignment_report(texts: list, store: AnnotationStore = default_store) -> pd.DataFrame:
+    """Counts the alignment status of all annotations per text, see `validate_alignment`.
+    """
+    tags = ['direct_speech', 'indirect_speech', 'narrated_character_speech', 'secondary_narration', 'tertiary_narration']
+    return pd.DataFrame(
+        {
+            text: validate_alignment(
+                store.load(text=text, tags=tags, columns=['annotation', 'start_point', 'end_point']),
+                text=text,
+                root=store.root
+            ).value_counts()
+            for text in texts
+        }
+    ).T.fillna(0).astype(int)
@@ -0,0 +1,241 @@
+"""Benchmarks for the hot paths of narrview on the bundled corpus and on scaled copies of it.
+
+Usage:
+    python -m narrview.benchmark --scales 1 10 --texts 1810-kohlhaas 1806-krug
+    python -m narrview.benchmark --compare .benchmarks/<old>.json .benchmarks/<new>.json
+    python -m narrview.benchmark --root synthetic --scales 1    # a corpus written by `narrview.synthetic`
+
+Every run is stored as JSON in `.benchmarks/`, named by git commit and time, so that runs of different
+commits can be compared. A scaled copy repeats the annotations of each text `scale` times one after another.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import pandas as pd
+from narrview.layout import compute_layout
+from narrview.metrics import network_stats
+from narrview.network import Network, create_network_from_edges, get_edges
+from narrview.scatter import single_text_scatter, split_by_prop, subcorpus_scatter
+from narrview.store import annotation_path, corpora, default_store, plays, stories
+from narrview.synthetic import register_synthetic
+
+
+default_output = '.benchmarks'
+
+
+def measure(function: Callable, repeat: int = 5, setup: Callable = None) -> Dict[str, float]:
+    """Runs a function `repeat` times and returns minimum, median and mean duration in seconds.
+    `setup` runs before every call and is not measured.
+    """
+    durations = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return {
+        'min': min(durations),
+        'median': statistics.median(durations),
+        'mean': statistics.mean(durations),
+        'repeat': repeat
+    }
+
+
+def write_scaled_corpus(root: str, output_root: str, scale: int, texts: List[str]) -> None:
+    """Writes annotation files repeating the annotations of each text `scale` times one after another.
+    """
+    for text in texts:
+        with open(annotation_path(text=text, root=root), encoding='utf-8') as json_file:
+            records = json.load(json_file)
+        extent = max(record['end_point'] for record in records)
+        scaled_records = []
+        for i in range(scale):
+            for record in records:
+                if record['tag'] == 'primary_narration':
+                    if i == 0:
+                        scaled_records.append(dict(record, end_point=record['end_point'] + (scale - 1) * extent))
+                    continue
+                scaled_records.append(
+                    dict(
+                        record,
+                        start_point=record['start_point'] + i * extent,
+                        end_point=record['end_point'] + i * extent
+                    )
+                )
+        path = annotation_path(text=text, root=output_root)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as json_file:
+            json.dump(scaled_records, json_file, ensure_ascii=False)
+
+
+@contextmanager
+def corpus_root(root: str, columnar_path: Optional[str] = None):
+    """Points the shared store to another repository root, and to a Parquet corpus of it if given, for the duration
+    of the context.
+    """
+    previous_root, previous_columnar_path = default_store.root, default_store.columnar_path
+    default_store.root, default_store.columnar_path = root, columnar_path
+    default_store.clear()
+    try:
+        yield
+    finally:
+        default_store.root, default_store.columnar_path = previous_root, previous_columnar_path
+        default_store.clear()
+
+
+def text_benchmarks(text: str, network_annotations: str) -> Dict[str, tuple]:
+    """Returns the benchmarks of a single text as name -> (function, setup).
+    """
+    network = Network(text=text, network_annotations=network_annotations, layout_cache=None)
+    tags = network.included_tags
+
+    def split():
+        split_by_prop(df=default_store.load(text=text, tags=tags), prop='prop:speaker')
+
+    edges = list(get_edges(text=text, network_annotations=network_annotations))
+
+    return {
+        'load_document': (lambda: default_store.document(text), default_store.clear),
+        'get_edges': (lambda: list(get_edges(text=text, network_annotations=network_annotations)), None),
+        'split_by_prop': (split, None),
+        'network_graph_build': (lambda: create_network_from_edges(edges=edges), None),
+        'network_layout': (lambda: compute_layout(network.network_graph, cache=None), None),
+        'network_stats': (lambda: network_stats(network.network_graph), None),
+        'network_figure': (lambda: network.figure(), None),
+        'network_figure_batched': (lambda: network.figure(batched=True), None),
+        'single_text_scatter': (
+            lambda: single_text_scatter(
+                text=text, tags=tags, y_column='prop:speaker', color_column='prop:addressee'),
+            None
+        ),
+    }
+
+
+def run(
+        texts: List[str],
+        scales: List[int] = [1],
+        network_annotations: str = 'character_speech',
+        repeat: int = 5,
+        root: str = '.') -> pd.DataFrame:
+    """Runs all benchmarks for the given texts and scales.
+
+    Returns:
+        pd.DataFrame: One row per benchmark, text and scale with the durations in seconds.
+    """
+    results = []
+    for scale in scales:
+        work_dir = tempfile.mkdtemp(prefix=f'narrview-x{scale}-')
+        scaled_root = work_dir if scale > 1 else root
+        try:
+            if scale > 1:
+                write_scaled_corpus(root=root, output_root=scaled_root, scale=scale, texts=texts)
+            columnar_path = default_store.columnar_path
+            if columnar_path is not None and os.path.abspath(scaled_root) != os.path.abspath(default_store.root):
+                from narrview.columnar import convert_corpus
+
+                # the Parquet corpus of the shared store holds the texts of its own root, so that the scaled
+                # corpus is converted as well to benchmark the same backend
+                columnar_path = convert_corpus(
+                    root=scaled_root, output=os.path.join(work_dir, 'narrview_corpus.parquet'), texts=texts)
+            with corpus_root(scaled_root, columnar_path=columnar_path):
+                for text in texts:
+                    for name, (function, setup) in text_benchmarks(text, network_annotations).items():
+                        results.append(
+                            dict(benchmark=name, text=text, scale=scale, **measure(function, repeat, setup)))
+                for corpus in ['Novellas', 'Dramas']:
+                    if set(corpora[corpus]) <= set(texts):
+                        results.append(
+                            dict(
+                                benchmark='subcorpus_scatter', text=corpus, scale=scale,
+                                **measure(lambda: subcorpus_scatter(corpus=corpus), repeat, default_store.clear)
+                            )
+                        )
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return pd.DataFrame(results)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def save(results: pd.DataFrame, output_dir: str = default_output) -> str:
+    commit = git_commit()
+    timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f'{timestamp}-{commit}.json')
+    with open(path, 'w', encoding='utf-8') as json_file:
+        json.dump(
+            {
+                'commit': commit,
+                'timestamp': timestamp,
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'results': results.to_dict(orient='records')
+            },
+            json_file,
+            indent=1
+        )
+    return path
+
+
+def load(path: str) -> pd.DataFrame:
+    with open(path, encoding='utf-8') as json_file:
+        return pd.DataFrame(json.load(json_file)['results'])
+
+
+def compare(previous: pd.DataFrame, current: pd.DataFrame, statistic: str = 'median') -> pd.DataFrame:
+    """Compares two benchmark runs. A ratio above 1 means the current run is slower.
+    """
+    keys = ['benchmark', 'text', 'scale']
+    comparison = previous[keys + [statistic]].merge(
+        current[keys + [statistic]], on=keys, suffixes=('_previous', '_current'))
+    comparison['ratio'] = comparison[f'{statistic}_current'] / comparison[f'{statistic}_previous']
+    return comparison.sort_values('ratio', ascending=False)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the hot paths of narrview.')
+    parser.add_argument('--texts', nargs='+', help='short titles of the texts, defaults to all texts of the root')
+    parser.add_argument('--root', default='.', help='repository root or root of a synthetic corpus')
+    parser.add_argument('--scales', nargs='+', type=int, default=[1, 10], help='corpus scale factors, e.g. 1 10 100')
+    parser.add_argument(
+        '--annotations', default='character_speech', choices=['character_speech', 'embedded_narrations'],
+        help='annotation type of the networks')
+    parser.add_argument('--repeat', type=int, default=5, help='repetitions per benchmark')
+    parser.add_argument('--output', default=default_output, help='directory of the stored runs')
+    parser.add_argument('--compare', nargs=2, metavar=('PREVIOUS', 'CURRENT'), help='compare two stored runs')
+    args = parser.parse_args()
+
+    pd.set_option('display.width', 200)
+    if args.compare:
+        print(compare(load(args.compare[0]), load(args.compare[1])).to_string(index=False))
+    else:
+        texts = args.texts
+        if args.root != '.':
+            synthetic_texts = register_synthetic(args.root)
+            texts = texts or synthetic_texts
+        results = run(
+            texts=texts or plays + stories,
+            scales=args.scales,
+            network_annotations=args.annotations,
+            repeat=args.repeat,
+            root=args.root
+        )
+        print(results.to_string(index=False))
+        print(save(results, args.output))
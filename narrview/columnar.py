@@ -0,0 +1,199 @@
+"""Converts the JSON annotation files into a single columnar Parquet file.
+
+Usage:
+    python -m narrview.columnar --root . --output narrview_corpus.parquet
+
+Each document is written as its own row group, so that loaders reading a single text only touch the
+row group of that text. `document` and `tag` are stored as dictionary-encoded columns, all `prop:*` values
+as list columns. The text columns (`left_context`, `annotation`, `right_context`) are separate column
+chunks and can be skipped by column projection. The columns of every document in the order of its JSON file are
+stored in the file metadata, so that documents are read with the same columns as from the JSON files.
+"""
+import argparse
+import json
+from typing import Dict, List
+import numpy as np
+from narrview.store import annotation_path, plays, stories, text_columns
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:     # pragma: no cover
+    pa = None
+    pq = None
+
+
+default_output = 'narrview_corpus.parquet'
+columns_key = b'narrview.columns'
+
+
+def require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError(
+            'The columnar corpus format requires pyarrow. Install it with `pip install pyarrow`.')
+
+
+def corpus_schema(prop_columns: List[str], document_columns: Dict[str, List[str]] = None) -> 'pa.Schema':
+    require_pyarrow()
+    fields = [
+        pa.field('document', pa.dictionary(pa.int32(), pa.string())),
+        pa.field('tag', pa.dictionary(pa.int32(), pa.string())),
+    ]
+    fields += [pa.field(column, pa.string()) for column in text_columns]
+    fields += [
+        pa.field('start_point', pa.int64()),
+        pa.field('end_point', pa.int64()),
+        pa.field('date', pa.timestamp('ms')),
+    ]
+    fields += [pa.field(column, pa.list_(pa.string())) for column in prop_columns]
+    metadata = {columns_key: json.dumps(document_columns)} if document_columns is not None else None
+    return pa.schema(fields, metadata=metadata)
+
+
+def document_table(records: List[dict], schema: 'pa.Schema') -> 'pa.Table':
+    columns = {}
+    for field in schema:
+        values = [record.get(field.name) for record in records]
+        if pa.types.is_list(field.type):
+            values = [value if value is not None else [] for value in values]
+        if pa.types.is_dictionary(field.type):
+            columns[field.name] = pa.array(values, type=pa.string()).dictionary_encode()
+        else:
+            columns[field.name] = pa.array(values, type=field.type)
+    return pa.table(columns, schema=schema)
+
+
+def convert_corpus(root: str = '.', output: str = default_output, texts: List[str] = None) -> str:
+    """Writes the annotations of all texts into a single Parquet file with one row group per document.
+
+    Args:
+        root (str, optional): The repository root containing the annotation folders. Defaults to '.'.
+        output (str, optional): Path of the Parquet file. Defaults to 'narrview_corpus.parquet'.
+        texts (List[str], optional): The texts to convert. Defaults to None (all plays and stories).
+
+    Returns:
+        str: The path of the written file.
+    """
+    require_pyarrow()
+    texts = texts or plays + stories
+    documents = {}
+    for text in texts:
+        with open(annotation_path(text=text, root=root), encoding='utf-8') as json_file:
+            documents[text] = json.load(json_file)
+
+    prop_columns = sorted(
+        {
+            key for records in documents.values() for record in records
+            for key in record if key.startswith('prop:')
+        }
+    )
+    document_columns = {
+        text: list(dict.fromkeys(key for record in records for key in record))
+        for text, records in documents.items()
+    }
+    schema = corpus_schema(prop_columns=prop_columns, document_columns=document_columns)
+    with pq.ParquetWriter(output, schema=schema) as writer:
+        for records in documents.values():
+            writer.write_table(document_table(records=records, schema=schema))
+
+    return output
+
+
+def document_columns(path: str = default_output) -> Dict[str, List[str]]:
+    """Returns the columns of every document in the order of its JSON file, or None for files written without them.
+    """
+    require_pyarrow()
+    metadata = pq.read_schema(path).metadata or {}
+    if columns_key not in metadata:
+        return None
+    return json.loads(metadata[columns_key])
+
+
+def corpus_columns(path: str = default_output, texts: List[str] = None) -> List[str]:
+    """Returns the columns of the given documents in the order of their JSON files, like concatenating them.
+    """
+    columns = document_columns(path)
+    if columns is None:
+        return pq.read_schema(path).names
+    return list(dict.fromkeys(
+        column for text in (texts if texts is not None else columns) for column in columns.get(text, [])))
+
+
+def read_corpus(
+        path: str = default_output,
+        texts: List[str] = None,
+        tags: List[str] = None,
+        columns: List[str] = None,
+        window: tuple = None) -> 'pd.DataFrame':
+    """Reads annotations from the Parquet corpus using memory-mapping, column projection and predicate pushdown.
+
+    Args:
+        path (str, optional): Path of the Parquet file. Defaults to 'narrview_corpus.parquet'.
+        texts (List[str], optional): Only read these documents. Defaults to None (all documents).
+        tags (List[str], optional): Only read annotations with these tags. Defaults to None (all tags).
+        columns (List[str], optional): Only read these columns. Defaults to None (all columns).
+        window (tuple, optional): Only read annotations in the window (abs_start_point, abs_end_point, mode),
+            see `narrview.intervals.IntervalIndex.query`. Defaults to None (the whole text).
+
+    Raises:
+        KeyError: If a requested column is missing in the JSON file of a requested document.
+
+    Returns:
+        pd.DataFrame: The annotations with the columns of the JSON files. `document` and `tag` are categorical
+            columns, properties missing in the JSON file of a document are NaN.
+    """
+    require_pyarrow()
+    columns_per_document = document_columns(path)
+    if columns_per_document is not None:
+        read_texts = list(texts) if texts is not None else list(columns_per_document)
+        if columns is None:
+            columns = corpus_columns(path, read_texts)
+        else:
+            for text in read_texts:
+                missing = [column for column in columns if column not in columns_per_document.get(text, columns)]
+                if missing:
+                    raise KeyError(f'{missing} not in the columns of "{text}"')
+
+    filters = []
+    if texts is not None:
+        filters.append(('document', 'in', list(texts)))
+    if tags is not None:
+        filters.append(('tag', 'in', list(tags)))
+    if window is not None:
+        abs_start_point, abs_end_point, mode = window
+        if mode == 'overlap':
+            filters += [('start_point', '<=', abs_end_point), ('end_point', '>=', abs_start_point)]
+        else:
+            filters += [('start_point', '>=', abs_start_point), ('start_point', '<=', abs_end_point)]
+            if mode == 'contained':
+                filters.append(('end_point', '<=', abs_end_point))
+
+    table = pq.read_table(
+        path,
+        columns=list(columns) if columns is not None else None,
+        filters=filters or None,
+        memory_map=True
+    )
+    corpus_df = table.to_pandas()
+    # pyarrow returns list values as arrays, the JSON backend as lists
+    for column in corpus_df:
+        if column.startswith('prop:'):
+            corpus_df[column] = [
+                list(values) if isinstance(values, np.ndarray) else values for values in corpus_df[column]
+            ]
+    if columns_per_document is not None and 'document' in corpus_df:
+        # the schema holds the union of all properties, which are empty lists for documents without them
+        for text in corpus_df['document'].unique():
+            absent = [column for column in corpus_df if column not in columns_per_document[text]]
+            if absent:
+                corpus_df.loc[corpus_df['document'] == text, absent] = np.nan
+    return corpus_df
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Convert the JSON annotations into a single Parquet file.')
+    parser.add_argument('--root', default='.', help='repository root')
+    parser.add_argument('--output', default=default_output, help='output file')
+    args = parser.parse_args()
+    print(convert_corpus(root=args.root, output=args.output))
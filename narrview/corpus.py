@@ -0,0 +1,130 @@
+from typing import Dict, List, Optional
+import pandas as pd
+import networkx as nx
+from narrview.intervals import check_mode
+from narrview.metrics import network_stats
+from narrview.network import edge_pairs, network_positions
+from narrview.store import corpora, default_store
+
+
+class CorpusNetwork:
+    def __init__(
+            self,
+            texts: Optional[List[str]] = None,
+            network_annotations: str = 'character_speech',
+            start_point: float = 0,
+            end_point: float = 1.0,
+            window_mode: str = 'start',
+            aliases: Optional[Dict[str, str]] = None,
+            merge_texts: bool = False):
+        """Networks of several texts with the same edges as the `Network` of each text, built from the cached
+        integer-coded property columns.
+
+        Args:
+            texts (List[str], optional): The texts short titles or a corpus name ('Novellas', 'Dramas', 'All').
+                Defaults to None (all texts).
+            network_annotations (str, optional): 'character_speech' or 'embedded_narrations'. Defaults to 'character_speech'.
+            start_point (float, optional): Which text parts should be included, as fraction of each text. Defaults to 0.
+            end_point (float, optional): Which text parts should be included, as fraction of each text. Defaults to 1.0.
+            window_mode (str, optional): 'start', 'contained' or 'overlap', see `narrview.intervals.IntervalIndex.query`.
+                Defaults to 'start'.
+            aliases (Dict[str, str], optional): Maps character names to a canonical name, either for all texts
+                ('Kohlhaas') or for a single text ('1810-kohlhaas:Kohlhaas'). Defaults to None.
+            merge_texts (bool, optional): Whether characters with the same (canonical) name are one node across texts.
+                Otherwise node IDs are qualified by the text, e.g. '1810-kohlhaas:Michael_Kohlhaas'. Defaults to False.
+        """
+        check_mode(window_mode)
+        if texts is None:
+            texts = corpora['All']
+        elif isinstance(texts, str):
+            texts = corpora[texts]
+        self.texts = list(texts)
+        self.network_annotations = network_annotations
+        self.start_point = start_point
+        self.end_point = end_point
+        self.aliases = aliases or {}
+        self.merge_texts = merge_texts
+
+        # one row per speaker-addressee pair, from the same annotations as the `Network` of each text
+        parts = []
+        for text in self.texts:
+            positions = network_positions(
+                text=text,
+                network_annotations=network_annotations,
+                start_point=start_point,
+                end_point=end_point,
+                window_mode=window_mode
+            )
+            _, speaker_codes, addressee_codes = edge_pairs(text=text, positions=positions)
+            prop_columns = default_store.prop_columns(text)
+            parts.append(
+                pd.DataFrame(
+                    {
+                        'document': text,
+                        'speaker': prop_columns['prop:speaker'].vocabulary[speaker_codes],
+                        'addressee': prop_columns['prop:addressee'].vocabulary[addressee_codes]
+                    }
+                )
+            )
+        pairs = pd.concat(parts, ignore_index=True)
+        pairs['document'] = pd.Categorical(pairs['document'], categories=self.texts)
+        for column in ['speaker', 'addressee']:
+            pairs[column] = self.resolve(pairs['document'].astype(str), pairs[column])
+        self.edges = pairs.groupby(
+            ['document', 'speaker', 'addressee'], sort=False, observed=True
+        ).size().rename('weight').reset_index()
+
+    def resolve(self, documents: pd.Series, names: pd.Series) -> pd.Series:
+        """Maps character names to canonical names via the alias table.
+        """
+        qualified = documents + ':' + names
+        resolved = qualified.map(self.aliases)
+        resolved = resolved.fillna(names.map(self.aliases))
+        return resolved.fillna(names)
+
+    def node_ids(self, documents: pd.Series, names: pd.Series) -> pd.Series:
+        if self.merge_texts:
+            return names
+        return documents.astype(str) + ':' + names
+
+    def graph(self) -> nx.DiGraph:
+        """Returns one graph for all texts. Edge weights of merged characters are summed up.
+        """
+        edge_df = self.edges.assign(
+            speaker=self.node_ids(self.edges['document'], self.edges['speaker']),
+            addressee=self.node_ids(self.edges['document'], self.edges['addressee'])
+        ).groupby(['speaker', 'addressee'], sort=False)['weight'].sum().reset_index()
+        di_graph = nx.DiGraph()
+        di_graph.add_weighted_edges_from(edge_df.itertuples(index=False, name=None))
+        return di_graph
+
+    def graphs(self) -> Dict[str, nx.DiGraph]:
+        """Returns one graph per text with the (canonical) character names as nodes.
+        """
+        graphs = {}
+        for text in self.texts:
+            edge_df = self.edges[self.edges['document'] == text]
+            di_graph = nx.DiGraph()
+            di_graph.add_weighted_edges_from(
+                zip(edge_df['speaker'], edge_df['addressee'], edge_df['weight']))
+            graphs[text] = di_graph
+        return graphs
+
+    def stats(self, **kwargs) -> pd.DataFrame:
+        """Returns the network stats of every text stacked in one DataFrame indexed by document and character.
+        Keyword arguments are passed to `narrview.metrics.network_stats`.
+        """
+        parts = {
+            text: network_stats(graph, **kwargs)
+            for text, graph in self.graphs().items()
+        }
+        stats_df = pd.concat(parts, names=['document', 'character'])
+        return stats_df
+
+    def weight_matrix(self) -> pd.DataFrame:
+        """Returns the summed edge weights per text and speaker-addressee pair as a DataFrame with one column per text.
+        """
+        return self.edges.pivot_table(
+            index=['speaker', 'addressee'], columns='document', values='weight',
+            aggfunc='sum', fill_value=0, observed=True
+        )
@@ -0,0 +1,252 @@
+"""Precomputed annotation counts for distribution queries and histograms without the raw annotations.
+
+Usage:
+    python -m narrview.cube --output narrview_cube.pkl --bins 100
+
+The cube holds the number of annotations and their summed lengths (`end_point - start_point`) per document, tag and
+position bin, and additionally per property value for every `prop:*` column. Position bins are fractions of the
+annotated text length, so bins of different texts are comparable. The `primary_narration` rows are left out.
+"""
+import argparse
+import os
+import pickle
+from typing import TYPE_CHECKING, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+from narrview.store import AnnotationStore, annotation_path, corpora, default_store, file_signature
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+
+default_output = 'narrview_cube.pkl'
+measures = ['count', 'length']
+
+
+class AggregateCube:
+    def __init__(self, texts: Optional[List[str]] = None, bins: int = 100, store: AnnotationStore = default_store):
+        """Aggregates the annotations of the given texts.
+
+        Args:
+            texts (List[str], optional): The texts short titles. Defaults to None (all texts).
+            bins (int, optional): Number of position bins per text. Defaults to 100.
+            store (AnnotationStore, optional): The store the annotations are loaded from. Defaults to `default_store`.
+        """
+        self.texts = list(texts) if texts is not None else corpora['All']
+        self.bins = bins
+        self.store = store
+        self.signatures = {}
+        totals = []
+        props = []
+        for text in self.texts:
+            annotation_df = store.document(text)
+            rows = np.flatnonzero((annotation_df.tag != 'primary_narration').to_numpy())
+            start_points = annotation_df.start_point.to_numpy()[rows]
+            lengths = annotation_df.end_point.to_numpy()[rows] - start_points
+            position_bins = np.minimum(start_points * bins // store.extent(text), bins - 1)
+            tags = annotation_df.tag.to_numpy()[rows]
+            totals.append(
+                pd.DataFrame({'tag': tags, 'bin': position_bins, 'count': 1, 'length': lengths})
+                .groupby(['tag', 'bin'], observed=True).sum().reset_index().assign(document=text)
+            )
+
+            for prop, column in store.prop_columns(text).items():
+                value_counts, positions = column.gather(rows)
+                row_ids = np.repeat(np.arange(len(rows)), value_counts)
+                props.append(
+                    pd.DataFrame(
+                        {
+                            'tag': tags[row_ids],
+                            'value': column.vocabulary[column.codes[positions]],
+                            'bin': position_bins[row_ids],
+                            'count': 1,
+                            'length': lengths[row_ids]
+                        }
+                    ).groupby(['tag', 'value', 'bin'], observed=True).sum().reset_index().assign(
+                        document=text, prop=prop)
+                )
+            path = annotation_path(text=text, root=store.root) if store.columnar_path is None else store.columnar_path
+            self.signatures[path] = file_signature(path)
+
+        dimensions = ['document', 'tag']
+        self.totals = self._compact(pd.concat(totals, ignore_index=True), dimensions)
+        self.props = self._compact(pd.concat(props, ignore_index=True), dimensions + ['prop', 'value'])
+
+    def _compact(self, cube_df: pd.DataFrame, dimensions: List[str]) -> pd.DataFrame:
+        for dimension in dimensions:
+            cube_df[dimension] = cube_df[dimension].astype('category')
+        cube_df['bin'] = cube_df['bin'].astype(np.int32)
+        return cube_df[dimensions + ['bin'] + measures]
+
+    def is_current(self) -> bool:
+        """Whether none of the aggregated annotation files (or the Parquet corpus) changed since the cube was built.
+        """
+        return all(
+            os.path.exists(path) and file_signature(path) == signature
+            for path, signature in self.signatures.items()
+        )
+
+    def save(self, path: str = default_output) -> None:
+        store, self.store = self.store, None
+        try:
+            with open(path, 'wb') as cube_file:
+                pickle.dump(self, cube_file, protocol=pickle.HIGHEST_PROTOCOL)
+        finally:
+            self.store = store
+
+    @classmethod
+    def load(cls, path: str = default_output, store: AnnotationStore = default_store) -> 'AggregateCube':
+        with open(path, 'rb') as cube_file:
+            cube = pickle.load(cube_file)
+        cube.store = store
+        return cube
+
+    @classmethod
+    def load_or_build(
+            cls,
+            path: str = default_output,
+            texts: Optional[List[str]] = None,
+            bins: int = 100,
+            store: AnnotationStore = default_store) -> 'AggregateCube':
+        """Loads the persisted cube, or builds and persists it if it is missing, outdated or has other bins.
+        """
+        if os.path.exists(path):
+            cube = cls.load(path=path, store=store)
+            if (texts is None or set(texts) <= set(cube.texts)) and cube.bins == bins and cube.is_current():
+                return cube
+        cube = cls(texts=texts, bins=bins, store=store)
+        cube.save(path)
+        return cube
+
+    def _select(
+            self,
+            cube_df: pd.DataFrame,
+            texts: Optional[Iterable[str]],
+            tags: Optional[Iterable[str]],
+            start_point: float,
+            end_point: float) -> pd.DataFrame:
+        """Selects cells by documents, tags and the position bins starting within [start_point, end_point).
+        """
+        selected = np.ones(len(cube_df), dtype=bool)
+        if texts is not None:
+            selected &= cube_df.document.isin(list(texts)).to_numpy()
+        if tags is not None:
+            selected &= cube_df.tag.isin(list(tags)).to_numpy()
+        if start_point > 0 or end_point < 1.0:
+            bin_starts = cube_df.bin.to_numpy() / self.bins
+            selected &= (bin_starts >= start_point) & (bin_starts < end_point)
+        return cube_df[selected]
+
+    def query(
+            self,
+            by: List[str],
+            prop: Optional[str] = None,
+            texts: Optional[Iterable[str]] = None,
+            tags: Optional[Iterable[str]] = None,
+            start_point: float = 0,
+            end_point: float = 1.0,
+            measure: str = 'count') -> pd.Series:
+        """Sums up a measure over all cells matching the filters, grouped by some dimensions.
+
+        Args:
+            by (List[str]): Dimensions to group by: 'document', 'tag', 'bin' and, with `prop`, 'value'.
+            prop (str, optional): A `prop:*` column. Annotations are counted once per value. Defaults to None.
+            texts (Iterable[str], optional): Only include these texts. Defaults to None (all texts of the cube).
+            tags (Iterable[str], optional): Only include these tags. Defaults to None (all tags).
+            start_point (float, optional): Start of the window as fraction of the text length, rounded to bins.
+                Defaults to 0.
+            end_point (float, optional): End of the window as fraction of the text length, rounded to bins.
+                Defaults to 1.0.
+            measure (str, optional): 'count' (number of annotations) or 'length' (summed lengths). Defaults to 'count'.
+
+        Returns:
+            pd.Series: The measure per group.
+        """
+        if measure not in measures:
+            raise ValueError(f'"{measure}" is no valid measure! Choose one of {", ".join(measures)}.')
+        if prop is None:
+            cube_df = self.totals
+        else:
+            cube_df = self.props[self.props.prop == prop]
+            if cube_df.empty:
+                raise ValueError(f'"{prop}" is no valid property!')
+        dimensions = list(cube_df.columns.drop(measures).drop('prop', errors='ignore'))
+        for dimension in by:
+            if dimension not in dimensions:
+                raise ValueError(f'"{dimension}" is no valid dimension! Choose one of {", ".join(dimensions)}.')
+
+        cube_df = self._select(cube_df, texts, tags, start_point, end_point)
+        if not by:
+            return pd.Series({measure: cube_df[measure].sum()})
+        return cube_df.groupby(by, observed=True)[measure].sum()
+
+    def distribution(
+            self,
+            prop: str,
+            texts: Optional[Iterable[str]] = None,
+            tags: Optional[Iterable[str]] = None,
+            start_point: float = 0,
+            end_point: float = 1.0,
+            measure: str = 'count',
+            normalize: bool = False) -> pd.DataFrame:
+        """Returns the distribution of the values of a property per document, e.g. how often each character speaks.
+
+        Returns:
+            pd.DataFrame: One row per value and one column per document, shares per document if `normalize`.
+        """
+        distribution_df = self.query(
+            by=['value', 'document'], prop=prop, texts=texts, tags=tags,
+            start_point=start_point, end_point=end_point, measure=measure
+        ).unstack('document', fill_value=0)
+        if normalize:
+            distribution_df = distribution_df / distribution_df.sum()
+        return distribution_df
+
+    def histogram(
+            self,
+            by: Optional[str] = None,
+            prop: Optional[str] = None,
+            texts: Optional[Iterable[str]] = None,
+            tags: Optional[Iterable[str]] = None,
+            measure: str = 'count') -> pd.DataFrame:
+        """Returns the measure per position bin, optionally split by 'document', 'tag' or (with `prop`) 'value'.
+
+        Returns:
+            pd.DataFrame: One row per bin (all bins, also empty ones) and one column per group.
+        """
+        histogram_df = self.query(
+            by=['bin'] + ([by] if by is not None else []), prop=prop, texts=texts, tags=tags, measure=measure)
+        histogram_df = histogram_df.unstack(by, fill_value=0) if by is not None else histogram_df.to_frame()
+        return histogram_df.reindex(range(self.bins), fill_value=0)
+
+    def histogram_figure(
+            self,
+            color_column: str = 'tag',
+            texts: Optional[Iterable[str]] = None,
+            tags: Optional[Iterable[str]] = None,
+            measure: str = 'count',
+            title: Optional[str] = None) -> 'go.Figure':
+        """Plots the histogram of annotation positions as stacked bars, colored by 'tag', 'document' or a `prop:*`
+        column, like the marginal histograms of `subcorpus_scatter`.
+        """
+        import plotly.express as px
+
+        if color_column.startswith('prop:'):
+            histogram_df = self.histogram(by='value', prop=color_column, texts=texts, tags=tags, measure=measure)
+        else:
+            histogram_df = self.histogram(by=color_column, texts=texts, tags=tags, measure=measure)
+        plot_df = histogram_df.rename_axis('bin').reset_index().melt(
+            id_vars='bin', var_name=color_column, value_name=measure)
+        plot_df['position'] = plot_df['bin'] / self.bins
+        fig = px.bar(plot_df, x='position', y=measure, color=color_column, title=title)
+        fig.update_layout(template='simple_white', bargap=0)
+        return fig
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the aggregate cube of the annotations.')
+    parser.add_argument('--output', default=default_output, help='output file')
+    parser.add_argument('--bins', type=int, default=100, help='position bins per text')
+    args = parser.parse_args()
+    AggregateCube(bins=args.bins).save(args.output)
+    print(args.output)
@@ -0,0 +1,209 @@
+"""Renders network and scatter figures for the whole corpus without a notebook.
+
+Usage:
+    python -m narrview.export --output exports --windows 0-1 0-0.33 0.33-0.66 0.66-1 --formats html json
+
+Every combination of text, annotation type and window is rendered as network graph and as scatter plot
+in a process pool. Outputs whose annotation file and parameters did not change since the last export are
+skipped, based on the fingerprints stored in `manifest.json` in the output directory.
+"""
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, List, Tuple
+from narrview.intervals import parse_window
+from narrview.manifest import read_manifest, write_manifest
+from narrview.network import Network, network_tags
+from narrview.scatter import single_text_scatter
+from narrview.store import annotation_path, default_store, file_signature, plays, stories
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+
+formats = ['html', 'json', 'png', 'svg']
+
+
+@dataclass
+class ExportJob:
+    kind: str
+    text: str
+    network_annotations: str
+    start_point: float
+    end_point: float
+
+    @property
+    def name(self) -> str:
+        return f'{self.text}_{self.network_annotations}_{self.start_point:g}-{self.end_point:g}'
+
+    def outputs(self, output_dir: str, export_formats: List[str]) -> List[str]:
+        return [
+            os.path.join(output_dir, self.kind, f'{self.name}.{export_format}')
+            for export_format in export_formats
+        ]
+
+    def fingerprint(self, root: str = '.') -> str:
+        fingerprint = json.dumps([asdict(self), *file_signature(annotation_path(text=self.text, root=root))])
+        return hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
+
+
+def export_jobs(
+        texts: List[str],
+        annotation_types: List[str],
+        windows: List[Tuple[float, float]],
+        kinds: List[str] = ['network', 'scatter']) -> List[ExportJob]:
+    return [
+        ExportJob(
+            kind=kind,
+            text=text,
+            network_annotations=network_annotations,
+            start_point=start_point,
+            end_point=end_point
+        )
+        for text in texts
+        for network_annotations in annotation_types
+        for start_point, end_point in windows
+        for kind in kinds
+    ]
+
+
+def job_figure(job: ExportJob) -> 'go.Figure':
+    if job.kind == 'network':
+        return Network(
+            text=job.text,
+            network_annotations=job.network_annotations,
+            start_point=job.start_point,
+            end_point=job.end_point
+        ).figure(print_title=True, batched=True)
+    elif job.kind == 'scatter':
+        return single_text_scatter(
+            text=job.text,
+            tags=network_tags[job.network_annotations],
+            color_column='prop:addressee',
+            start_point=job.start_point,
+            end_point=job.end_point
+        )
+    raise ValueError(f'"{job.kind}" is no valid figure kind! Choose either "network" or "scatter".')
+
+
+def set_root(root: str) -> None:
+    """Points the shared store of a worker process to the repository root of the export.
+    """
+    default_store.root = root
+
+
+def render_job(job: ExportJob, output_dir: str, export_formats: List[str]) -> Tuple[ExportJob, str]:
+    """Renders the figure of a job into all requested formats.
+
+    Returns:
+        Tuple[ExportJob, str]: The job and None on success or the error message.
+    """
+    try:
+        fig = job_figure(job)
+        for export_format, path in zip(export_formats, job.outputs(output_dir, export_formats)):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if export_format == 'html':
+                fig.write_html(path, include_plotlyjs='cdn')
+            elif export_format == 'json':
+                fig.write_json(path)
+            else:
+                fig.write_image(path)   # requires kaleido
+    except Exception as error:
+        return job, f'{type(error).__name__}: {error}'
+    return job, None
+
+
+def export(
+        jobs: List[ExportJob],
+        output_dir: str = 'exports',
+        export_formats: List[str] = ['html', 'json'],
+        processes: int = None,
+        force: bool = False,
+        root: str = '.') -> dict:
+    """Renders all jobs whose inputs changed since the last export in a process pool.
+
+    Args:
+        jobs (List[ExportJob]): The figures to render.
+        output_dir (str, optional): The output directory. Defaults to 'exports'.
+        export_formats (List[str], optional): Any of 'html', 'json', 'png' and 'svg'. Static images require kaleido.
+            Defaults to ['html', 'json'].
+        processes (int, optional): Number of worker processes. Defaults to None (one per CPU).
+        force (bool, optional): Whether to render jobs with unchanged inputs as well. Defaults to False.
+        root (str, optional): The repository root containing the annotation folders. Defaults to '.'.
+
+    Returns:
+        dict: Lists of job names per status: 'rendered', 'skipped' and 'failed' (with error messages).
+    """
+    for export_format in export_formats:
+        if export_format not in formats:
+            raise ValueError(f'"{export_format}" is no valid format! Choose from {", ".join(formats)}.')
+
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, 'manifest.json')
+    manifest = read_manifest(manifest_path)
+
+    report = {'rendered': [], 'skipped': [], 'failed': []}
+    pending = []
+    for job in jobs:
+        key = f'{job.kind}/{job.name}'
+        outputs_exist = all(os.path.exists(path) for path in job.outputs(output_dir, export_formats))
+        if not force and outputs_exist and manifest.get(key) == job.fingerprint(root):
+            report['skipped'].append(key)
+        else:
+            pending.append(job)
+
+    # the workers render through their shared store, which has to read the same root as the fingerprints
+    with ProcessPoolExecutor(max_workers=processes, initializer=set_root, initargs=(root,)) as executor:
+        futures = [executor.submit(render_job, job, output_dir, export_formats) for job in pending]
+        for future in as_completed(futures):
+            job, error = future.result()
+            key = f'{job.kind}/{job.name}'
+            if error is None:
+                manifest[key] = job.fingerprint(root)
+                report['rendered'].append(key)
+            else:
+                manifest.pop(key, None)
+                report['failed'].append(f'{key}: {error}')
+            # written per job, so that an interrupted export keeps the finished outputs
+            write_manifest(manifest, manifest_path)
+
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Render network and scatter figures for the corpus.')
+    parser.add_argument('--output', default='exports', help='output directory')
+    parser.add_argument('--texts', nargs='+', default=plays + stories, help='short titles of the texts')
+    parser.add_argument(
+        '--annotations', nargs='+', default=list(network_tags), choices=list(network_tags),
+        help='annotation types')
+    parser.add_argument(
+        '--windows', nargs='+', default=['0-1'], help='text parts as start-end fractions, e.g. 0-0.33')
+    parser.add_argument(
+        '--kinds', nargs='+', default=['network', 'scatter'], choices=['network', 'scatter'],
+        help='figure kinds')
+    parser.add_argument('--formats', nargs='+', default=['html', 'json'], choices=formats, help='output formats')
+    parser.add_argument('--processes', type=int, default=None, help='number of worker processes')
+    parser.add_argument('--force', action='store_true', help='render unchanged outputs as well')
+    args = parser.parse_args()
+
+    report = export(
+        jobs=export_jobs(
+            texts=args.texts,
+            annotation_types=args.annotations,
+            windows=[parse_window(window) for window in args.windows],
+            kinds=args.kinds
+        ),
+        output_dir=args.output,
+        export_formats=args.formats,
+        processes=args.processes,
+        force=args.force
+    )
+    for status, names in report.items():
+        print(f'{status}: {len(names)}')
+    for failure in report['failed']:
+        print(failure)
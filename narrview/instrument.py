@@ -0,0 +1,340 @@
+"""Named timing spans around the hot paths of narrview.
+
+Spans are recorded inside `instrument()`, or for every top-level call if the environment variable
+`NARRVIEW_INSTRUMENT` is set ('1' for timings, 'memory' for timings and memory peaks). Otherwise `span()` is a no-op.
+
+    with instrument(memory=True) as report:
+        Network('1810-kohlhaas').figure()
+    report.summary()
+
+Reports of environment-enabled calls are emitted to the sinks in `NARRVIEW_INSTRUMENT_SINKS`, a comma-separated list
+of 'log', a `*.jsonl` path and a `*.prom` path (Prometheus text file). Defaults to 'log'.
+"""
+import functools
+import inspect
+import json
+import logging
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional
+import pandas as pd
+
+
+logger = logging.getLogger('narrview')
+
+
+@dataclass
+class SpanRecord:
+    name: str
+    path: str
+    depth: int
+    start: float
+    duration: float
+    memory_peak: Optional[int] = None
+    text: Optional[str] = None
+    attributes: dict = field(default_factory=dict)
+
+
+class Report:
+    def __init__(self, memory: bool = False, **attributes):
+        """Spans recorded during one call, in the order they finished.
+
+        Args:
+            memory (bool, optional): Whether memory peaks are traced with `tracemalloc`. Defaults to False.
+            **attributes: Attributes of the call, e.g. the text.
+        """
+        self.memory = memory
+        self.attributes = attributes
+        self.timestamp = time.time()
+        self.records: List[SpanRecord] = []
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame([asdict(record) for record in self.records])
+
+    def summary(self) -> pd.DataFrame:
+        """Returns count, total duration and maximal memory peak per span name, slowest first.
+        """
+        records = self.frame()
+        if records.empty:
+            return records
+        return records.groupby('name').agg(
+            count=('duration', 'size'),
+            duration=('duration', 'sum'),
+            memory_peak=('memory_peak', 'max')
+        ).sort_values('duration', ascending=False)
+
+    def to_dict(self) -> dict:
+        return {
+            'timestamp': self.timestamp,
+            'attributes': self.attributes,
+            'spans': [asdict(record) for record in self.records]
+        }
+
+
+class _Span:
+    __slots__ = (
+        'report', 'parent', 'name', 'path', 'depth', 'text', 'attributes', 'start', 'memory_start', 'peak', 'token'
+    )
+
+    def __init__(self, report: Report, parent: Optional['_Span'], name: str, attributes: dict):
+        self.report = report
+        self.parent = parent
+        self.name = name
+        self.path = f'{parent.path}/{name}' if parent is not None else name
+        self.depth = parent.depth + 1 if parent is not None else 0
+        # the text is inherited from the enclosing spans, so that every span can be attributed to a text
+        self.text = attributes.get('text', parent.text if parent is not None else report.attributes.get('text'))
+        self.attributes = attributes
+        self.peak = 0
+
+    def __enter__(self) -> '_Span':
+        if self.report.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self.parent is not None:
+                self.parent.peak = max(self.parent.peak, peak)
+            tracemalloc.reset_peak()
+            self.memory_start = current
+        self.token = _current_span.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        duration = time.perf_counter() - self.start
+        memory_peak = None
+        if self.report.memory:
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            if self.parent is not None:
+                self.parent.peak = max(self.parent.peak, self.peak)
+            tracemalloc.reset_peak()
+            memory_peak = self.peak - self.memory_start
+        _current_span.reset(self.token)
+        self.report.records.append(
+            SpanRecord(
+                name=self.name,
+                path=self.path,
+                depth=self.depth,
+                start=self.start,
+                duration=duration,
+                memory_peak=memory_peak,
+                text=self.text,
+                attributes=self.attributes
+            )
+        )
+
+
+class _NullSpan:
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+
+_null_span = _NullSpan()
+_current_span: ContextVar[Optional[_Span]] = ContextVar('narrview_span', default=None)
+_current_report: ContextVar[Optional[Report]] = ContextVar('narrview_report', default=None)
+
+environment_mode = os.environ.get('NARRVIEW_INSTRUMENT', '').lower()
+if environment_mode in ['', '0', 'false', 'off']:
+    environment_mode = None
+
+
+class LogSink:
+    def __init__(self, logger: logging.Logger = logger, level: int = logging.INFO):
+        """Logs one line per span, indented by nesting depth.
+        """
+        self.logger = logger
+        self.level = level
+
+    def __call__(self, report: Report) -> None:
+        for record in sorted(report.records, key=lambda record: record.start):
+            memory = f' {record.memory_peak / 2 ** 20:.1f} MiB' if record.memory_peak is not None else ''
+            attributes = ''.join(f' {key}={value}' for key, value in record.attributes.items())
+            self.logger.log(
+                self.level, '%s%s %.1f ms%s%s', '  ' * record.depth, record.name, record.duration * 1000,
+                memory, attributes)
+
+
+class JSONLinesSink:
+    def __init__(self, path: str):
+        """Appends one JSON object per report to a file.
+        """
+        self.path = path
+
+    def __call__(self, report: Report) -> None:
+        with open(self.path, 'a', encoding='utf-8') as jsonl_file:
+            jsonl_file.write(json.dumps(report.to_dict(), default=str) + '\n')
+
+
+class PrometheusSink:
+    def __init__(self, path: str):
+        """Accumulates span counts, durations and memory peaks per span and text, and rewrites them as Prometheus
+        text file (e.g. for the node exporter's textfile collector) after every report.
+        """
+        self.path = path
+        self.metrics: Dict[tuple, list] = {}
+
+    def __call__(self, report: Report) -> None:
+        for record in report.records:
+            text = record.text or ''
+            metric = self.metrics.setdefault((record.name, text), [0, 0.0, None])
+            metric[0] += 1
+            metric[1] += record.duration
+            if record.memory_peak is not None:
+                metric[2] = max(metric[2] or 0, record.memory_peak)
+
+        lines = [
+            '# TYPE narrview_span_duration_seconds summary',
+        ]
+        for (name, text), (count, duration, _) in sorted(self.metrics.items()):
+            labels = f'span="{name}",text="{text}"'
+            lines.append(f'narrview_span_duration_seconds_count{{{labels}}} {count}')
+            lines.append(f'narrview_span_duration_seconds_sum{{{labels}}} {duration:.6f}')
+        lines.append('# TYPE narrview_span_memory_peak_bytes gauge')
+        for (name, text), (_, _, memory_peak) in sorted(self.metrics.items()):
+            if memory_peak is not None:
+                lines.append(f'narrview_span_memory_peak_bytes{{span="{name}",text="{text}"}} {memory_peak}')
+
+        temporary_path = f'{self.path}.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as prom_file:
+            prom_file.write('\n'.join(lines) + '\n')
+        os.replace(temporary_path, self.path)
+
+
+def sink_from_spec(spec: str) -> Callable[[Report], None]:
+    """Creates a sink from 'log', a `*.jsonl` path or a `*.prom` path.
+    """
+    if spec == 'log':
+        return LogSink()
+    elif spec.endswith('.jsonl'):
+        return JSONLinesSink(spec)
+    elif spec.endswith('.prom'):
+        return PrometheusSink(spec)
+    raise ValueError(f'"{spec}" is no valid sink! Choose "log", a *.jsonl or a *.prom path.')
+
+
+# sinks receiving the reports of environment-enabled top-level calls
+sinks: List[Callable[[Report], None]] = [
+    sink_from_spec(spec.strip())
+    for spec in os.environ.get('NARRVIEW_INSTRUMENT_SINKS', 'log').split(',') if spec.strip()
+] if environment_mode else []
+
+
+def add_sink(sink: Callable[[Report], None]) -> None:
+    sinks.append(sink)
+
+
+def emit(report: Report, report_sinks: List[Callable[[Report], None]]) -> None:
+    for sink in report_sinks:
+        try:
+            sink(report)
+        except Exception:
+            logger.exception('Instrumentation sink %r failed.', sink)
+
+
+@contextmanager
+def _root_span(name: str, attributes: dict):
+    """Top-level span of an environment-enabled call, emitting its report to the global sinks.
+    """
+    memory = environment_mode == 'memory'
+    report = Report(memory=memory, **attributes)
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    token = _current_report.set(report)
+    try:
+        with _Span(report, None, name, attributes):
+            yield
+    finally:
+        _current_report.reset(token)
+        if started_tracing:
+            tracemalloc.stop()
+        emit(report, sinks)
+
+
+def span(name: str, **attributes):
+    """Context manager timing a named span. Spans are nested by the call structure.
+
+    Args:
+        name (str): Name of the span, e.g. 'layout'.
+        **attributes: Attributes of the span, e.g. the text.
+    """
+    parent = _current_span.get()
+    if parent is not None:
+        return _Span(parent.report, parent, name, attributes)
+    report = _current_report.get()
+    if report is not None:
+        return _Span(report, None, name, attributes)
+    if environment_mode:
+        return _root_span(name, attributes)
+    return _null_span
+
+
+def active() -> bool:
+    """Whether spans are currently recorded.
+    """
+    return environment_mode is not None or _current_report.get() is not None
+
+
+def instrumented(name: str, attributes: List[str] = []) -> Callable:
+    """Decorator running a function inside a span.
+
+    Args:
+        name (str): Name of the span.
+        attributes (List[str], optional): Arguments of the function recorded as span attributes. Attributes of
+            arguments can be given as 'self.text'. Defaults to [].
+    """
+    def decorator(function: Callable) -> Callable:
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not active():
+                return function(*args, **kwargs)
+            span_attributes = {}
+            if attributes:
+                arguments = signature.bind(*args, **kwargs)
+                arguments.apply_defaults()
+                for attribute in attributes:
+                    argument, *path = attribute.split('.')
+                    value = arguments.arguments[argument]
+                    for part in path:
+                        value = getattr(value, part)
+                    span_attributes[path[-1] if path else argument] = value
+            with span(name, **span_attributes):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def instrument(sinks: Optional[List[Callable[[Report], None]]] = None, memory: bool = False, **attributes):
+    """Records all spans inside the context into a report.
+
+    Args:
+        sinks (List[Callable[[Report], None]], optional): Sinks the report is emitted to at the end. Defaults to None.
+        memory (bool, optional): Whether to trace memory peaks with `tracemalloc`, which slows down allocations.
+            Defaults to False.
+        **attributes: Attributes of the report, e.g. a request ID.
+
+    Yields:
+        Report: The report, complete after the context ends.
+    """
+    report = Report(memory=memory, **attributes)
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    report_token = _current_report.set(report)
+    span_token = _current_span.set(None)
+    try:
+        yield report
+    finally:
+        _current_span.reset(span_token)
+        _current_report.reset(report_token)
+        if started_tracing:
+            tracemalloc.stop()
+        emit(report, sinks or [])
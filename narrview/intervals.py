@@ -0,0 +1,111 @@
+from typing import Tuple
+import numpy as np
+import pandas as pd
+
+
+modes = ['start', 'contained', 'overlap']
+
+
+def check_mode(mode: str) -> None:
+    """Raises a ValueError unless the window mode is one of `modes`.
+    """
+    if mode not in modes:
+        raise ValueError(f'"{mode}" is no valid window mode! Choose one of {", ".join(modes)}.')
+
+
+def check_window(start_point: float, end_point: float) -> None:
+    """Raises a ValueError unless a text part given as fractions of the annotated text length lies within the text.
+    """
+    if not 0 <= start_point <= end_point <= 1:
+        raise ValueError(f'"{start_point}-{end_point}" is no valid window! Use 0 <= start_point <= end_point <= 1.')
+
+
+def parse_window(window: str) -> Tuple[float, float]:
+    """Parses a text part given as 'start-end' fractions of the annotated text length, e.g. '0-0.33'.
+    """
+    try:
+        start_point, end_point = map(float, window.split('-'))
+    except ValueError:
+        raise ValueError(f'"{window}" is no valid window! Use start-end fractions, e.g. 0-0.33.')
+    check_window(start_point, end_point)
+    return start_point, end_point
+
+
+def window_mask(
+        annotation_df: pd.DataFrame,
+        abs_start_point: float,
+        abs_end_point: float,
+        mode: str = 'overlap') -> np.ndarray:
+    """Same as `IntervalIndex.query`, as a boolean mask computed by a linear scan. Cheaper than building an index
+    for frames that are only queried once.
+
+    Returns:
+        np.ndarray: Whether each annotation lies in the window [abs_start_point, abs_end_point].
+    """
+    check_mode(mode)
+    start_points = annotation_df['start_point'].to_numpy()
+    end_points = annotation_df['end_point'].to_numpy()
+    if mode == 'overlap':
+        return (start_points <= abs_end_point) & (end_points >= abs_start_point)
+    mask = (start_points >= abs_start_point) & (start_points <= abs_end_point)
+    if mode == 'contained':
+        mask &= end_points <= abs_end_point
+    return mask
+
+
+class IntervalIndex:
+    def __init__(self, start_points, end_points):
+        """Sorted index over the character offsets of annotations for window queries by binary search.
+
+        Args:
+            start_points (array-like): The start points of the annotations.
+            end_points (array-like): The end points of the annotations.
+        """
+        start_points = np.asarray(start_points, dtype=np.int64)
+        end_points = np.asarray(end_points, dtype=np.int64)
+        self.order = np.argsort(start_points, kind='stable')
+        self.start_points = start_points[self.order]
+        self.end_points = end_points[self.order]
+        # running maximum of the end points, monotonic and therefore searchable
+        self.max_end_points = np.maximum.accumulate(self.end_points) if len(self.end_points) \
+            else self.end_points
+
+    @classmethod
+    def from_frame(cls, annotation_df: pd.DataFrame) -> 'IntervalIndex':
+        return cls(
+            start_points=annotation_df['start_point'].to_numpy(),
+            end_points=annotation_df['end_point'].to_numpy()
+        )
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def query(self, abs_start_point: float, abs_end_point: float, mode: str = 'overlap') -> np.ndarray:
+        """Returns the positions of all annotations in the window [abs_start_point, abs_end_point].
+
+        Args:
+            abs_start_point (float): Start of the window as character offset.
+            abs_end_point (float): End of the window as character offset.
+            mode (str, optional): 'start': annotations starting within the window,
+                'contained': annotations starting and ending within the window,
+                'overlap': annotations overlapping the window. Defaults to 'overlap'.
+
+        Returns:
+            np.ndarray: Sorted row positions of the matching annotations.
+        """
+        check_mode(mode)
+
+        upper = np.searchsorted(self.start_points, abs_end_point, side='right')
+        if mode == 'overlap':
+            lower = np.searchsorted(self.max_end_points, abs_start_point, side='left')
+            candidates = slice(lower, max(lower, upper))
+            selected = self.end_points[candidates] >= abs_start_point
+        else:
+            lower = np.searchsorted(self.start_points, abs_start_point, side='left')
+            candidates = slice(lower, max(lower, upper))
+            if mode == 'contained':
+                selected = self.end_points[candidates] <= abs_end_point
+            else:
+                selected = slice(None)
+
+        return np.sort(self.order[candidates][selected])
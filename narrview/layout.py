@@ -0,0 +1,209 @@
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional
+import numpy as np
+import networkx as nx
+from narrview.instrument import instrumented
+
+
+def structure_hash(network_graph: nx.DiGraph) -> str:
+    """Hash over the nodes and edges of a graph. Edge weights are ignored, since layouts are computed without them.
+    """
+    structure = json.dumps(
+        [
+            sorted(map(str, network_graph.nodes)),
+            sorted([str(u), str(v)] for u, v in network_graph.edges)
+        ]
+    )
+    return hashlib.sha1(structure.encode('utf-8')).hexdigest()
+
+
+def layout_name(network_layout: Callable) -> str:
+    """Name of a layout function in cache keys. Partials include their arguments. Lambdas and local functions,
+    which share their qualified names, include a hash of their code, defaults and closure.
+    """
+    if isinstance(network_layout, functools.partial):
+        arguments = [repr(argument) for argument in network_layout.args] + [
+            f'{key}={value!r}' for key, value in sorted(network_layout.keywords.items())
+        ]
+        return f'{layout_name(network_layout.func)}({", ".join(arguments)})'
+    qualname = getattr(network_layout, '__qualname__', None)
+    if qualname is None:
+        return repr(network_layout)
+    name = f'{getattr(network_layout, "__module__", None)}.{qualname}'
+    code = getattr(network_layout, '__code__', None)
+    if '<' in qualname and code is not None:
+        closure = []
+        for cell in network_layout.__closure__ or []:
+            try:
+                closure.append(cell.cell_contents)
+            except ValueError:     # empty cell
+                closure.append(None)
+        content = repr(
+            (code.co_code, code.co_consts, code.co_names,
+             network_layout.__defaults__, network_layout.__kwdefaults__, closure)
+        )
+        name += '@' + hashlib.sha1(content.encode('utf-8')).hexdigest()[:12]
+    return name
+
+
+def positions_hash(network_graph: nx.DiGraph, pos: dict) -> str:
+    """Hash over the given positions of the nodes of a graph, identifying a warm start.
+    """
+    positions = json.dumps(
+        sorted([str(node), *map(float, pos[node])] for node in network_graph if node in pos)
+    )
+    return hashlib.sha1(positions.encode('utf-8')).hexdigest()
+
+
+# layouts that need node partitions, a start node or a planar graph, which character networks do not have
+unsupported_layouts = ['bfs', 'bipartite', 'multipartite', 'planar']
+
+
+def callable_layouts() -> List[str]:
+    """Returns the names of the networkx layouts that `compute_layout` can call with a graph alone,
+    e.g. 'kamada_kawai' or 'circular'.
+    """
+    names = []
+    for function_name in dir(nx.drawing.layout):
+        name = function_name[:-len('_layout')]
+        function = getattr(nx.drawing.layout, function_name)
+        if not function_name.endswith('_layout') or not callable(function) or name in unsupported_layouts:
+            continue
+        parameters = list(inspect.signature(function).parameters.values())
+        if parameters and parameters[0].name == 'G' and all(
+                parameter.default is not parameter.empty
+                or parameter.kind in (parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD)
+                for parameter in parameters[1:]):
+            names.append(name)
+    return names
+
+
+def layout_function(name: str) -> Callable:
+    """Returns the networkx layout function of a name from `callable_layouts`, e.g. 'kamada_kawai'.
+    """
+    if name not in callable_layouts():
+        raise ValueError(f'"{name}" is no valid layout! Choose one of {", ".join(callable_layouts())}.')
+    return getattr(nx.drawing.layout, f'{name}_layout')
+
+
+class LayoutCache:
+    def __init__(self, maxsize: int = 256, directory: Optional[str] = None):
+        """LRU cache of node positions keyed by layout function and graph structure, optionally backed by a directory
+        with one JSON file per layout.
+
+        Args:
+            maxsize (int, optional): Maximal number of layouts held in memory. Defaults to 256.
+            directory (str, optional): Directory for persisted layouts. Defaults to None (memory only).
+        """
+        self.maxsize = maxsize
+        self.directory = directory
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _file(self, key: tuple) -> str:
+        return os.path.join(self.directory, f'{hashlib.sha1(json.dumps(key).encode("utf-8")).hexdigest()}.json')
+
+    def get(self, key: tuple) -> Optional[dict]:
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return dict(self._cache[key])
+
+        if self.directory is not None and os.path.exists(self._file(key)):
+            with open(self._file(key), encoding='utf-8') as json_file:
+                items = json.load(json_file)
+            pos = {node: np.array(coordinates) for node, coordinates in items}
+            self._put(key, pos)
+            return dict(pos)
+
+        return None
+
+    def _put(self, key: tuple, pos: dict) -> None:
+        with self._lock:
+            self._cache[key] = pos
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def put(self, key: tuple, pos: dict) -> None:
+        pos = {node: np.asarray(coordinates) for node, coordinates in pos.items()}
+        self._put(key, pos)
+        if self.directory is not None:
+            with open(self._file(key), 'w', encoding='utf-8') as json_file:
+                json.dump([[node, list(map(float, xy))] for node, xy in pos.items()], json_file)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+default_layout_cache = LayoutCache(directory=os.environ.get('NARRVIEW_LAYOUT_CACHE'))
+
+
+def complete_positions(network_graph: nx.DiGraph, initial_pos: dict, seed: int = 0) -> dict:
+    """Completes initial positions for a warm start: nodes without a position are placed at the mean position
+    of their positioned neighbors, or at a random position if none of them is positioned.
+    """
+    rng = np.random.default_rng(seed)
+    pos = {node: np.asarray(initial_pos[node]) for node in network_graph if node in initial_pos}
+    for node in network_graph:
+        if node in pos:
+            continue
+        neighbor_positions = [
+            pos[neighbor] for neighbor in nx.all_neighbors(network_graph, node) if neighbor in pos
+        ]
+        if neighbor_positions:
+            pos[node] = np.mean(neighbor_positions, axis=0) + rng.normal(scale=0.05, size=2)
+        else:
+            pos[node] = rng.uniform(-1, 1, size=2)
+    return pos
+
+
+@instrumented('layout')
+def compute_layout(
+        network_graph: nx.DiGraph,
+        network_layout: Callable = nx.drawing.layout.kamada_kawai_layout,
+        cache: Optional[LayoutCache] = default_layout_cache,
+        initial_pos: Optional[dict] = None) -> dict:
+    """Computes node positions or returns them from the layout cache.
+
+    Args:
+        network_graph (nx.DiGraph): The network graph.
+        network_layout (Callable, optional): A networkx layout function. Defaults to nx.drawing.layout.kamada_kawai_layout.
+        cache (LayoutCache, optional): The layout cache. Defaults to `default_layout_cache`. None disables caching.
+        initial_pos (dict, optional): Positions to start from, e.g. the layout of the previous window. Only used by
+            layout functions accepting a `pos` argument. Defaults to None.
+
+    Returns:
+        dict: Position per node.
+    """
+    parameters = inspect.signature(network_layout).parameters
+    warm = bool(initial_pos) and network_graph.number_of_nodes() > 0 and 'pos' in parameters
+    # warm-started layouts depend on the initial positions, so they are cached separately from cold ones
+    key = (
+        layout_name(network_layout),
+        structure_hash(network_graph),
+        positions_hash(network_graph, initial_pos) if warm else None
+    )
+    if cache is not None:
+        pos = cache.get(key)
+        if pos is not None:
+            return pos
+
+    # layouts are computed without edge weights
+    kwargs = {'weight': None} if 'weight' in parameters else {}
+    if warm:
+        kwargs['pos'] = complete_positions(network_graph, initial_pos)
+    pos = network_layout(network_graph, **kwargs)
+
+    if cache is not None:
+        cache.put(key, pos)
+    return pos
@@ -0,0 +1,23 @@
+"""Manifests recording the fingerprint of every finished output, so that batch runs skip unchanged outputs and resume
+after an interruption. Used by `narrview.export` and `narrview.sweep`.
+"""
+import json
+import os
+
+
+def read_manifest(manifest_path: str) -> dict:
+    """Returns the manifest at the given path, or an empty one if there is none yet.
+    """
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, encoding='utf-8') as manifest_file:
+        return json.load(manifest_file)
+
+
+def write_manifest(manifest: dict, manifest_path: str) -> None:
+    """Replaces the manifest atomically, so that an interrupted run never leaves a truncated manifest.
+    """
+    temporary_path = f'{manifest_path}.tmp'
+    with open(temporary_path, 'w', encoding='utf-8') as manifest_file:
+        json.dump(manifest, manifest_file, indent=1, sort_keys=True)
+    os.replace(temporary_path, manifest_path)
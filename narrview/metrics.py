@@ -0,0 +1,189 @@
+import hashlib
+import json
+from typing import Hashable, List, Optional
+import numpy as np
+import pandas as pd
+import networkx as nx
+from narrview.instrument import instrumented, span
+
+
+stats_metrics = [
+    'degree', 'indegree', 'weighted_indegree', 'outdegree', 'weighted_outdegree',
+    'betweenness', 'betweenness_weighted', 'pagerank', 'pagerank_weighted'
+]
+backends = ['networkx', 'scipy']
+
+
+def require_scipy() -> None:
+    try:
+        import scipy  # noqa: F401
+    except ImportError:
+        raise ImportError('The "scipy" backend requires scipy. Install it with `pip install scipy`.')
+
+
+def graph_signature(network_graph: nx.DiGraph) -> Hashable:
+    """Hash over the nodes and the weighted edges of a graph, used to invalidate cached metrics.
+    Linear in the number of edges (up to sorting), which is still far cheaper than any of the metrics.
+    """
+    structure = json.dumps(
+        [
+            sorted(map(str, network_graph.nodes)),
+            sorted([str(u), str(v), weight] for u, v, weight in network_graph.edges(data='weight'))
+        ],
+        default=str
+    )
+    return hashlib.sha1(structure.encode('utf-8')).hexdigest()
+
+
+def sparse_pagerank(
+        network_graph: nx.DiGraph,
+        weight: Optional[str] = 'weight',
+        alpha: float = 0.85,
+        max_iter: int = 100,
+        tol: float = 1.0e-6) -> dict:
+    """Pagerank by power iteration on a sparse adjacency matrix. Dangling nodes distribute their rank uniformly,
+    as in `nx.pagerank`.
+    """
+    from scipy import sparse
+
+    nodes = list(network_graph)
+    n = len(nodes)
+    if n == 0:
+        return {}
+    adjacency = nx.to_scipy_sparse_array(
+        network_graph, nodelist=nodes, weight=weight, dtype=float, format='csr')
+    out_weights = np.asarray(adjacency.sum(axis=1)).ravel()
+    dangling = out_weights == 0
+    scale = np.divide(1.0, out_weights, out=np.zeros(n), where=~dangling)
+    transition = sparse.diags(scale) @ adjacency
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        last_rank = rank
+        rank = alpha * (rank @ transition + rank[dangling].sum() / n) + (1 - alpha) / n
+        if np.abs(rank - last_rank).sum() < n * tol:
+            return dict(zip(nodes, rank))
+    raise nx.PowerIterationFailedConvergence(max_iter)
+
+
+def sparse_degrees(network_graph: nx.DiGraph, metric: str) -> dict:
+    """Degree metrics as row and column sums of the sparse adjacency matrix.
+    """
+    nodes = list(network_graph)
+    if not nodes:
+        return {}
+    weight = 'weight' if metric.startswith('weighted') else None
+    adjacency = nx.to_scipy_sparse_array(
+        network_graph, nodelist=nodes, weight=weight, dtype=float, format='csr')
+    in_values = np.asarray(adjacency.sum(axis=0)).ravel()
+    out_values = np.asarray(adjacency.sum(axis=1)).ravel()
+    values = {
+        'degree': in_values + out_values,
+        'indegree': in_values,
+        'weighted_indegree': in_values,
+        'outdegree': out_values,
+        'weighted_outdegree': out_values,
+    }[metric]
+    if weight is None:
+        values = values.astype(int)
+    return dict(zip(nodes, values))
+
+
+def compute_metric(
+        network_graph: nx.DiGraph,
+        metric: str,
+        backend: str = 'networkx',
+        betweenness_k: Optional[int] = None,
+        seed: int = 0) -> dict:
+    """Computes a single network metric for all nodes.
+
+    Args:
+        network_graph (nx.DiGraph): The network graph.
+        metric (str): One of `stats_metrics`.
+        backend (str, optional): 'networkx' or 'scipy'. The 'scipy' backend computes pagerank and degree metrics
+            on a sparse adjacency matrix and requires scipy. Defaults to 'networkx'.
+        betweenness_k (int, optional): Number of pivot nodes to sample for betweenness. Defaults to None (all nodes).
+        seed (int, optional): Random seed for the pivot sampling. Defaults to 0.
+
+    Returns:
+        dict: Metric value per node.
+    """
+    if metric not in stats_metrics:
+        raise ValueError(f'"{metric}" is no valid metric! Choose one of {", ".join(stats_metrics)}.')
+    if backend not in backends:
+        raise ValueError(f'"{backend}" is no valid backend! Choose one of {", ".join(backends)}.')
+    if backend == 'scipy':
+        require_scipy()
+
+    with span('metric', metric=metric, backend=backend):
+        if metric.startswith('betweenness'):
+            k = None
+            if betweenness_k is not None and betweenness_k < network_graph.number_of_nodes():
+                k = betweenness_k
+            return nx.betweenness_centrality(
+                network_graph,
+                k=k,
+                normalized=True,
+                weight='weight' if metric == 'betweenness_weighted' else None,
+                seed=seed if k is not None else None
+            )
+
+        if backend == 'scipy':
+            if metric.startswith('pagerank'):
+                # nx.pagerank weights edges by default, so both pagerank columns are weighted
+                return sparse_pagerank(network_graph, weight='weight')
+            return sparse_degrees(network_graph, metric)
+
+        if metric == 'pagerank':
+            return nx.pagerank(network_graph)
+        if metric == 'pagerank_weighted':
+            return nx.pagerank(network_graph, weight='weight')
+        degree_function = {
+            'degree': network_graph.degree,
+            'indegree': network_graph.in_degree,
+            'weighted_indegree': network_graph.in_degree,
+            'outdegree': network_graph.out_degree,
+            'weighted_outdegree': network_graph.out_degree,
+        }[metric]
+        return dict(degree_function(weight='weight' if metric.startswith('weighted') else None))
+
+
+def stats_frame(metric_values: dict) -> pd.DataFrame:
+    """Assembles metric values into the stats DataFrame: nodes without edges are dropped, rows are sorted by
+    betweenness if it was computed.
+    """
+    network_df = pd.DataFrame(metric_values)
+    if 'degree' in network_df:
+        network_df = network_df[network_df.degree > 0]
+    if 'betweenness' in network_df:
+        network_df = network_df.sort_values(by='betweenness', ascending=False)
+    return network_df.fillna(value=0)
+
+
+@instrumented('stats')
+def network_stats(
+        network_graph: nx.DiGraph,
+        metrics: Optional[List[str]] = None,
+        backend: str = 'networkx',
+        betweenness_k: Optional[int] = None,
+        seed: int = 0) -> pd.DataFrame:
+    """Computes degree, betweenness and pagerank metrics for all nodes of a network graph.
+
+    Args:
+        network_graph (nx.DiGraph): The network graph.
+        metrics (List[str], optional): The metrics to compute. Defaults to None (all `stats_metrics`).
+        backend (str, optional): 'networkx' or 'scipy', see `compute_metric`. Defaults to 'networkx'.
+        betweenness_k (int, optional): Number of pivot nodes to sample for betweenness. Defaults to None (all nodes).
+        seed (int, optional): Random seed for the pivot sampling. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: One row per character, sorted by betweenness.
+    """
+    metrics = metrics or stats_metrics
+    return stats_frame(
+        {
+            metric: compute_metric(
+                network_graph, metric, backend=backend, betweenness_k=betweenness_k, seed=seed)
+            for metric in metrics
+        }
+    )
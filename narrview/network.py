@@ -1,20 +1,16 @@
+import numpy as np
 import pandas as pd
 import networkx as nx
-import plotly.graph_objects as go
-from IPython.display import display
 from dataclasses import dataclass
-from typing import List
-from narrview.scatter import single_text_scatter
+from typing import TYPE_CHECKING, List, Tuple
+from narrview.instrument import instrumented, span
+from narrview.layout import LayoutCache, compute_layout, default_layout_cache
+from narrview.props import cartesian
+from narrview.metrics import compute_metric, graph_signature, stats_frame, stats_metrics
+from narrview.store import default_store
 
-
-plays = [
-    '1802-schroffenstein', '1806-krug', '1806-amphitryon', '1807-penthesilea',
-    '1808-kaethchen', '1808-hermannsschlacht', '1810-homburg'
-]
-stories = [
-    '1807-erdbeben', '1810-kohlhaas', '1811-zweikampf', '1808-marquise',
-    '1811-verlobung', '1811-findling', '1810-caecilie'
-]
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
 
 
 @dataclass
@@ -36,92 +32,185 @@ def format_string_list(str_list: list) -> str:
     return out_str
 
 
-def get_edges(
-        text: str = '1810-kohlhaas',
-        network_annotations: str = 'character_speech',
-        start_point: float = 0,
-        end_point: int = 1.0):
-
-    if text in stories:
-        speech_data = pd.read_json(
-            f'AnnotationsNovellas/{text}_embedded_narrations.json')
-    elif text in plays:
-        speech_data = pd.read_json(
-            f'AnnotationsDramas/{text}_embedded_narrations.json')
-    else:
-        raise ValueError(f'"{text}" is no valid title!')
-
-    # filter by start and end point
-    max_end_point = max(speech_data.end_point)
-    start_point_filter = start_point * max_end_point
-    end_point_filter = end_point * max_end_point
-    speech_data = speech_data[
-        (speech_data.start_point >= start_point_filter) &
-        (speech_data.start_point <= end_point_filter)
+network_tags = {
+    'character_speech': [
+        'direct_speech',
+        'indirect_speech',
+        'narrated_character_speech'
+    ],
+    'embedded_narrations': [
+        'secondary_narration',
+        'tertiary_narration',
     ]
+}
 
-    # filter by annotation type
-    if network_annotations == 'character_speech':
-        if text == plays:
-            raise ValueError(
-                'For the dramas only networks based on embedded narrations are possible.')
-        else:
-            speech_data = speech_data[
-                speech_data.tag.isin(
-                    [
-                        'direct_speech',
-                        'indirect_speech',
-                        'narrated_character_speech'
-                    ]
-                )
-            ].copy()
-    elif network_annotations == 'embedded_narrations':
-        speech_data = speech_data[
-            speech_data.tag.isin(
-                [
-                    'secondary_narration',
-                    'tertiary_narration',
-                ]
-            )
-        ].copy()
-    else:
+
+def get_network_tags(network_annotations: str) -> List[str]:
+    if network_annotations not in network_tags:
         raise ValueError(
             "You didn't choose a valid annotation type.\
             Choose either 'character_speech' or 'embedded_narrations' as network_annotations"
         )
+    return network_tags[network_annotations]
+
+
+@instrumented('edge_aggregation', attributes=['text'])
+def get_edge_frame(
+        text: str = '1810-kohlhaas',
+        network_annotations: str = 'character_speech',
+        start_point: float = 0,
+        end_point: int = 1.0,
+        window_mode: str = 'start',
+        annotation_df: pd.DataFrame = None) -> pd.DataFrame:
+    """Aggregates the speaker-addressee pairs of the annotations into edges.
+
+    Args:
+        text (str, optional): The texts short title. Defaults to '1810-kohlhaas'.
+        network_annotations (str, optional): 'character_speech' or 'embedded_narrations'. Defaults to 'character_speech'.
+        start_point (float, optional): Which text parts should be included. Defaults to 0.
+        end_point (int, optional): Which text parts should be included. Defaults to 1.0.
+        window_mode (str, optional): Which annotations belong to the text part: 'start', 'contained' or 'overlap',
+            see `narrview.intervals.IntervalIndex.query`. Defaults to 'start'.
+        annotation_df (pd.DataFrame, optional): Annotations of the text to use instead of loading all annotations,
+            e.g. search results. Defaults to None.
+
+    Returns:
+        pd.DataFrame: One row per edge with the columns 'speaker', 'addressee', 'weight',
+            'text' (list of annotation strings) and 'start_point' (list of start points).
+    """
+    if annotation_df is None:
+        return get_encoded_edge_frame(
+            text=text,
+            network_annotations=network_annotations,
+            start_point=start_point,
+            end_point=end_point,
+            window_mode=window_mode
+        )
+
+    # filter annotations by annotation type, start and end point
+    speech_data = default_store.select(
+        annotation_df=annotation_df,
+        text=text,
+        tags=get_network_tags(network_annotations),
+        start_point=start_point,
+        end_point=end_point,
+        mode=window_mode
+    )[['annotation', 'start_point', 'prop:speaker', 'prop:addressee']]
+
+    # one row per speaker-addressee pair of each annotation
+    pairs = speech_data[:-1].explode('prop:speaker').explode('prop:addressee')
+    pairs = pairs.dropna(subset=['prop:speaker', 'prop:addressee'])
+
+    # aggregate edge weights, texts and start points per pair
+    return pairs.groupby(
+        ['prop:speaker', 'prop:addressee'], sort=False
+    ).agg(
+        weight=('annotation', 'size'),
+        text=('annotation', list),
+        start_point=('start_point', list)
+    ).rename_axis(
+        ['speaker', 'addressee']
+    ).reset_index()
+
+
+def network_positions(
+        text: str = '1810-kohlhaas',
+        network_annotations: str = 'character_speech',
+        start_point: float = 0,
+        end_point: float = 1.0,
+        window_mode: str = 'start') -> np.ndarray:
+    """Returns the rows of `default_store.document(text)` whose speaker-addressee pairs are the edges of the network
+    of a text part. As in `get_edge_frame`, the last annotation of the text part is left out.
+    """
+    return default_store.positions(
+        text=text,
+        tags=get_network_tags(network_annotations),
+        start_point=start_point,
+        end_point=end_point,
+        mode=window_mode
+    )[:-1]
+
+
+def edge_pairs(text: str, positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns the row, the speaker code and the addressee code of every speaker-addressee pair of the given rows
+    of `default_store.document(text)`, like exploding 'prop:speaker' and 'prop:addressee'. The codes refer to the
+    vocabularies of `default_store.prop_columns(text)`.
+    """
+    prop_columns = default_store.prop_columns(text)
+    rows, (speaker_codes, addressee_codes) = cartesian(
+        [prop_columns['prop:speaker'], prop_columns['prop:addressee']], positions)
+    return rows, speaker_codes, addressee_codes
 
-    # create edge dict for edge weights
-    edge_dict = {}
-    for _, row in speech_data[:-1].iterrows():
-        speakers = row['prop:speaker']
-        addressees = row['prop:addressee']
-        for speaker in speakers:
-            for addressee in addressees:
-                edge_id = f'{speaker}->{addressee}'  # create edge identifier
-                if edge_id in edge_dict:
-                    edge_dict[edge_id]['weight'] += 1
-                    edge_dict[edge_id]['text'].append(row['annotation'])
-                    edge_dict[edge_id]['start_point'].append(
-                        row['start_point'])
-                else:
-                    edge_dict[edge_id] = {
-                        'weight': 1,
-                        'text': [row['annotation']],
-                        'start_point': [row['start_point']]
-                    }
+
+def get_encoded_edge_frame(
+        text: str = '1810-kohlhaas',
+        network_annotations: str = 'character_speech',
+        start_point: float = 0,
+        end_point: int = 1.0,
+        window_mode: str = 'start') -> pd.DataFrame:
+    """Same as `get_edge_frame`, computed on the cached integer-coded property columns of the text.
+    """
+    document = default_store.document(text)
+    positions = network_positions(
+        text=text,
+        network_annotations=network_annotations,
+        start_point=start_point,
+        end_point=end_point,
+        window_mode=window_mode
+    )
+    rows, speaker_codes, addressee_codes = edge_pairs(text=text, positions=positions)
+    pairs = pd.DataFrame(
+        {
+            'speaker': speaker_codes,
+            'addressee': addressee_codes,
+            'annotation': document['annotation'].to_numpy()[rows],
+            'start_point': document['start_point'].to_numpy()[rows],
+        }
+    )
+
+    # aggregate edge weights, texts and start points per pair
+    edge_df = pairs.groupby(
+        ['speaker', 'addressee'], sort=False
+    ).agg(
+        weight=('annotation', 'size'),
+        text=('annotation', list),
+        start_point=('start_point', list)
+    ).reset_index()
+    prop_columns = default_store.prop_columns(text)
+    edge_df['speaker'] = prop_columns['prop:speaker'].vocabulary[edge_df['speaker'].to_numpy()]
+    edge_df['addressee'] = prop_columns['prop:addressee'].vocabulary[edge_df['addressee'].to_numpy()]
+    return edge_df
+
+
+def get_edges(
+        text: str = '1810-kohlhaas',
+        network_annotations: str = 'character_speech',
+        start_point: float = 0,
+        end_point: int = 1.0,
+        window_mode: str = 'start',
+        annotation_df: pd.DataFrame = None):
+
+    edge_df = get_edge_frame(
+        text=text,
+        network_annotations=network_annotations,
+        start_point=start_point,
+        end_point=end_point,
+        window_mode=window_mode,
+        annotation_df=annotation_df
+    )
 
     # yield edges as Edge objects
-    for edge in edge_dict:
-        speaker, addressee = edge.split('->')       # split by edge identifier
+    for speaker, addressee, weight, texts in zip(
+            edge_df.speaker, edge_df.addressee, edge_df.weight, edge_df.text):
         yield Edge(
             speaker=speaker,
             addressee=addressee,
-            text=format_string_list(edge_dict[edge]['text']),
-            weight=edge_dict[edge]['weight'],
-
+            text=format_string_list(texts),
+            weight=int(weight),
         )
 
 
+@instrumented('graph_build')
 def create_network_from_edges(edges: List[Edge]) -> nx.DiGraph:
     di_graph = nx.DiGraph()
     di_graph.add_weighted_edges_from(
@@ -158,9 +247,12 @@ def norm_col(value: float, values: pd.Series) -> float:
         values (pd.Series): the network metric values of all nodes
 
     Returns:
-        float: normalized network metric value
+        float: normalized network metric value, 0 if the metric is 0 for all nodes
     """
-    return value / sum(values)
+    total = sum(values)
+    if total == 0:
+        return 0.0
+    return value / total
 
 
 def get_node_data(
@@ -192,6 +284,154 @@ def get_node_data(
     }
 
 
+def add_edge_annotations(fig: 'go.Figure', edges: List[Edge], pos: dict) -> None:
+    """Draws every edge as an arrow annotation with its own hover trace.
+    """
+    import plotly.graph_objects as go
+
+    legend_groups = []
+    edge_weight_sum = sum([edge.weight for edge in edges])
+    for edge in edges:
+        lg = speaker_addressee_str(edge)
+        speaker_coordinates = speaker_point(
+            p1_x=pos[edge.addressee][0],
+            p1_y=pos[edge.addressee][1],
+            p2_x=pos[edge.speaker][0],
+            p2_y=pos[edge.speaker][1],
+            distance=0.03
+        )
+        addressee_coordinates = speaker_point(
+            p1_x=pos[edge.addressee][0],
+            p1_y=pos[edge.addressee][1],
+            p2_x=pos[edge.speaker][0],
+            p2_y=pos[edge.speaker][1],
+            distance=0.97
+        )
+        # plot edges
+        fig.add_annotation(
+            x=speaker_coordinates[0],  # arrows' head
+            y=speaker_coordinates[1],  # arrows' head
+            ax=addressee_coordinates[0],  # arrows' tail
+            ay=addressee_coordinates[1],  # arrows' tail
+            xref='x',
+            yref='y',
+            axref='x',
+            ayref='y',
+            text='',  # if you want only the arrow
+            showarrow=True,
+            arrowhead=4,
+            arrowsize=0.6,
+            arrowwidth=edge.weight / edge_weight_sum * 100 + 1,
+            arrowcolor='grey',
+            opacity=0.3
+        )
+        legend_groups.append(lg)
+
+        # plot hovertext per edge
+        hover_pos = speaker_point(
+            p1_x=pos[edge.speaker][0],
+            p1_y=pos[edge.speaker][1],
+            p2_x=pos[edge.addressee][0],
+            p2_y=pos[edge.addressee][1]
+        )
+        if len(edge.text) > 500:
+            edge.text = edge.text[:500] + '<br>[...]'
+        fig.add_trace(
+            go.Scatter(
+                x=[hover_pos[0]],
+                y=[hover_pos[1]],
+                mode='markers',
+                marker_symbol='cross-thin',
+                name=lg,
+                text=f"<b>{lg}</b>:<br>{edge.text}",
+                marker=dict(
+                    color='grey',
+                    opacity=0.4,
+                    size=edge.weight / edge_weight_sum * 100 + 1
+                ),
+                showlegend=False,
+                hoverinfo='text'
+            )
+        )
+
+
+def add_batched_edges(fig: 'go.Figure', edges: List[Edge], pos: dict, width_buckets: int = 5) -> None:
+    """Draws all edges as a few line traces, one per bucket of arrow widths, with NaN separators between the
+    segments, and all hover texts as a single marker trace.
+
+    Args:
+        fig (go.Figure): The figure to draw on.
+        edges (List[Edge]): The edges.
+        pos (dict): Position per node.
+        width_buckets (int, optional): Number of distinct line widths. Defaults to 5.
+    """
+    import plotly.graph_objects as go
+
+    if not edges:
+        return
+
+    weights = np.array([edge.weight for edge in edges], dtype=float)
+    widths = weights / weights.sum() * 100 + 1
+    speaker_xy = np.array([pos[edge.speaker] for edge in edges], dtype=float)
+    addressee_xy = np.array([pos[edge.addressee] for edge in edges], dtype=float)
+
+    # arrows point from speaker to addressee with a V-shaped head
+    heads = 0.97 * addressee_xy + 0.03 * speaker_xy
+    tails = 0.03 * addressee_xy + 0.97 * speaker_xy
+    direction = heads - tails
+    length = np.linalg.norm(direction, axis=1, keepdims=True)
+    unit = np.divide(direction, length, out=np.zeros_like(direction), where=length > 0)
+    normal = unit[:, ::-1] * np.array([-1, 1])
+    head_length = (0.015 + 0.005 * widths)[:, None]
+    wing_base = heads - unit * head_length
+    left_wings = wing_base + normal * head_length / 2
+    right_wings = wing_base - normal * head_length / 2
+    gaps = np.full((len(edges), 2), np.nan)
+    segments = np.stack(
+        [tails, heads, gaps, left_wings, heads, right_wings, gaps], axis=1)
+
+    if widths.max() > widths.min():
+        buckets = ((widths - widths.min()) / (widths.max() - widths.min()) * width_buckets).astype(int)
+        buckets = np.minimum(buckets, width_buckets - 1)
+    else:
+        buckets = np.zeros(len(edges), dtype=int)
+    for bucket in np.unique(buckets):
+        selected = buckets == bucket
+        fig.add_trace(
+            go.Scatter(
+                x=segments[selected, :, 0].ravel(),
+                y=segments[selected, :, 1].ravel(),
+                mode='lines',
+                line=dict(color='grey', width=float(widths[selected].mean())),
+                opacity=0.3,
+                showlegend=False,
+                hoverinfo='skip'
+            )
+        )
+
+    hover_xy = 0.9 * speaker_xy + 0.1 * addressee_xy
+    hover_data = []
+    for edge in edges:
+        text = edge.text if len(edge.text) <= 500 else edge.text[:500] + '<br>[...]'
+        hover_data.append([speaker_addressee_str(edge), text])
+    fig.add_trace(
+        go.Scatter(
+            x=hover_xy[:, 0],
+            y=hover_xy[:, 1],
+            mode='markers',
+            marker_symbol='cross-thin',
+            customdata=hover_data,
+            hovertemplate='<b>%{customdata[0]}</b>:<br>%{customdata[1]}<extra></extra>',
+            marker=dict(
+                color='grey',
+                opacity=0.4,
+                size=widths
+            ),
+            showlegend=False
+        )
+    )
+
+
 class Network:
     def __init__(
             self,
@@ -199,7 +439,11 @@ class Network:
             network_annotations: str = 'character_speech',
             start_point: float = 0,
             end_point: int = 1.0,
-            network_layout: callable = nx.drawing.layout.kamada_kawai_layout):
+            network_layout: callable = nx.drawing.layout.kamada_kawai_layout,
+            layout_cache: LayoutCache = default_layout_cache,
+            initial_pos: dict = None,
+            annotation_df: pd.DataFrame = None,
+            window_mode: str = 'start'):
         """Network class to create a networkx graph from annotations.
 
         Args:
@@ -209,86 +453,113 @@ class Network:
             start_point (float, optional): Which text parts should be included. Defaults  to 0.
             end_point (int, optional): Which text parts should be included. Defaults to 1.0.
             network_layout (callable, optional): A [networkx layout function](https://networkx.org/documentation/stable/reference/drawing.html). Defaults to nx.drawing.layout.kamada_kawai_layout.
+            layout_cache (LayoutCache, optional): Cache for node positions keyed by layout function and graph structure.
+                None disables caching. Defaults to `narrview.layout.default_layout_cache`.
+            initial_pos (dict, optional): Node positions to warm-start the layout from, e.g. `pos` of a network of a
+                neighboring text part. Defaults to None.
+            annotation_df (pd.DataFrame, optional): Annotations of the text to build the network from instead of all
+                annotations, e.g. search results. Defaults to None.
+            window_mode (str, optional): Which annotations belong to the text part: 'start', 'contained' or 'overlap',
+                see `narrview.intervals.IntervalIndex.query`. Defaults to 'start'.
         """
-        self.text = text
-        self.included_tags = [
-            'direct_speech', 'indirect_speech', 'narrated_character_speech'
-        ]
-        if network_annotations == 'embedded_narrations':
-            self.included_tags = [
-                'secondary_narrations', 'tertiary_narrations'
-            ]
-        self.start_point = start_point
-        self.end_point = end_point
-        self.edges = list(
-            get_edges(
-                text=text,
-                network_annotations=network_annotations,
-                start_point=start_point,
-                end_point=end_point
+        with span('network', text=text):
+            self.text = text
+            self.included_tags = get_network_tags(network_annotations)
+            self.start_point = start_point
+            self.end_point = end_point
+            self.window_mode = window_mode
+            self.edges = list(
+                get_edges(
+                    text=text,
+                    network_annotations=network_annotations,
+                    start_point=start_point,
+                    end_point=end_point,
+                    window_mode=window_mode,
+                    annotation_df=annotation_df
+                )
+            )
+            self.network_graph = create_network_from_edges(
+                edges=self.edges)
+
+            self.pos = compute_layout(
+                self.network_graph,
+                network_layout=network_layout,
+                cache=layout_cache,
+                initial_pos=initial_pos
             )
-        )
-        self.network_graph = create_network_from_edges(
-            edges=self.edges)
-
-        self.pos = network_layout(self.network_graph, weight=None)
-
-    def stats(self) -> pd.DataFrame:
-        bc = nx.betweenness_centrality(self.network_graph, normalized=True)
-        bc_weighted = nx.betweenness_centrality(
-            self.network_graph, normalized=True, weight='weight')
-        pr = nx.pagerank(self.network_graph)
-        pr_weighted = nx.pagerank(self.network_graph, weight='weight')
-        degree = self.network_graph.degree()
-        indegree = self.network_graph.in_degree()
-        weighted_indegree = self.network_graph.in_degree(weight='weight')
-        outdegree = self.network_graph.out_degree()
-        weighted_outdegree = self.network_graph.out_degree(weight='weight')
-
-        network_df = pd.DataFrame(
-            {
-                'degree': dict(degree),
-                'indegree': dict(indegree),
-                'weighted_indegree': dict(weighted_indegree),
-                'outdegree': dict(outdegree),
-                'weighted_outdegree': dict(weighted_outdegree),
-                'betweenness': dict(bc),
-                'betweenness_weighted': dict(bc_weighted),
-                'pagerank': dict(pr),
-                'pagerank_weighted': dict(pr_weighted),
-            }
-        )
 
-        network_df = network_df[network_df.degree > 0]
-        return network_df.sort_values(by='betweenness', ascending=False).fillna(value=0)
+    @property
+    def network_graph(self) -> nx.DiGraph:
+        return self._network_graph
 
-    def plot(
+    @network_graph.setter
+    def network_graph(self, network_graph: nx.DiGraph) -> None:
+        self._network_graph = network_graph
+        self._metric_cache = {}
+
+    @instrumented('stats', attributes=['self.text'])
+    def stats(
+            self,
+            metrics: List[str] = None,
+            backend: str = 'networkx',
+            betweenness_k: int = None,
+            seed: int = 0) -> pd.DataFrame:
+        """Network metrics per character. Each metric is computed lazily on first request and cached until the
+        graph is replaced or its nodes, edges or weights change.
+
+        Args:
+            metrics (List[str], optional): The metrics to include. Defaults to None (all metrics).
+            backend (str, optional): 'networkx' or 'scipy'. The 'scipy' backend computes pagerank and degree metrics
+                on a sparse adjacency matrix and requires scipy. Defaults to 'networkx'.
+            betweenness_k (int, optional): Number of pivot nodes to sample for betweenness on large graphs.
+                Defaults to None (exact betweenness).
+            seed (int, optional): Random seed for the pivot sampling. Defaults to 0.
+
+        Returns:
+            pd.DataFrame: One row per character, sorted by betweenness.
+        """
+        signature = graph_signature(self.network_graph)
+        if self._metric_cache.get('signature') != signature:
+            self._metric_cache = {'signature': signature}
+
+        metric_values = {}
+        for metric in metrics or stats_metrics:
+            key = (metric, backend, betweenness_k if metric.startswith('betweenness') else None, seed)
+            if key not in self._metric_cache:
+                self._metric_cache[key] = compute_metric(
+                    self.network_graph,
+                    metric,
+                    backend=backend,
+                    betweenness_k=betweenness_k,
+                    seed=seed
+                )
+            metric_values[metric] = self._metric_cache[key]
+
+        return stats_frame(metric_values)
+
+    @instrumented('figure', attributes=['self.text'])
+    def figure(
             self,
             node_size: str = 'betweenness',
             node_factor: float = 100.0,
             node_alpha: int = 3,
-            plot_stats: bool = True,
             print_title: bool = False,
-            plot_scatter: bool = False):
-        """Plots network as plotly graph.
+            batched: bool = False) -> 'go.Figure':
+        """Creates the plotly figure of the network.
 
         Args:
             node_size (str, optional): Which network metric to use as node size. Defaults to 'betweenness'.
             node_factor (float, optional): Customize the node size. Defaults to 100.0.
             node_alpha (int, optional): Minimal node size. Defaults to 3.
-            plot_stats (bool, optional): Whether to plot the stats as `pandas.DataFrame`. Defaults to True.
             print_title (bool, optional): Whether to plot the title of the plottet Text. Defaults to False.
+            batched (bool, optional): Whether to draw all edges in a few traces instead of one arrow annotation
+                and one trace per edge. Recommended for dense networks. Defaults to False.
+
+        Returns:
+            go.Figure: The network graph.
         """
-        if plot_scatter:
-            single_text_scatter(
-                text=self.text,
-                tags=self.included_tags,
-                color_column='prop:addressee',
-                start_point=self.start_point,
-                end_point=self.end_point
-            ).show()
+        import plotly.graph_objects as go
 
-        plot_edges = self.edges
         stats = self.stats()
         speaker_size = dict(
             stats[node_size].apply(
@@ -298,70 +569,10 @@ class Network:
         )
 
         fig = go.Figure()
-        legend_groups = []
-        edge_weight_sum = sum([edge.weight for edge in plot_edges])
-        for edge in plot_edges:
-            lg = speaker_addressee_str(edge)
-            speaker_coordinates = speaker_point(
-                p1_x=self.pos[edge.addressee][0],
-                p1_y=self.pos[edge.addressee][1],
-                p2_x=self.pos[edge.speaker][0],
-                p2_y=self.pos[edge.speaker][1],
-                distance=0.03
-            )
-            addressee_coordinates = speaker_point(
-                p1_x=self.pos[edge.addressee][0],
-                p1_y=self.pos[edge.addressee][1],
-                p2_x=self.pos[edge.speaker][0],
-                p2_y=self.pos[edge.speaker][1],
-                distance=0.97
-            )
-            # plot edges
-            fig.add_annotation(
-                x=speaker_coordinates[0],  # arrows' head
-                y=speaker_coordinates[1],  # arrows' head
-                ax=addressee_coordinates[0],  # arrows' tail
-                ay=addressee_coordinates[1],  # arrows' tail
-                xref='x',
-                yref='y',
-                axref='x',
-                ayref='y',
-                text='',  # if you want only the arrow
-                showarrow=True,
-                arrowhead=4,
-                arrowsize=0.6,
-                arrowwidth=edge.weight / edge_weight_sum * 100 + 1,
-                arrowcolor='grey',
-                opacity=0.3
-            )
-            legend_groups.append(lg)
-
-            # plot hovertext per edge
-            hover_pos = speaker_point(
-                p1_x=self.pos[edge.speaker][0],
-                p1_y=self.pos[edge.speaker][1],
-                p2_x=self.pos[edge.addressee][0],
-                p2_y=self.pos[edge.addressee][1]
-            )
-            if len(edge.text) > 500:
-                edge.text = edge.text[:500] + '<br>[...]'
-            fig.add_trace(
-                go.Scatter(
-                    x=[hover_pos[0]],
-                    y=[hover_pos[1]],
-                    mode='markers',
-                    marker_symbol='cross-thin',
-                    name=lg,
-                    text=f"<b>{lg}</b>:<br>{edge.text}",
-                    marker=dict(
-                        color='grey',
-                        opacity=0.4,
-                        size=edge.weight / edge_weight_sum * 100 + 1
-                    ),
-                    showlegend=False,
-                    hoverinfo='text'
-                )
-            )
+        if batched:
+            add_batched_edges(fig=fig, edges=self.edges, pos=self.pos)
+        else:
+            add_edge_annotations(fig=fig, edges=self.edges, pos=self.pos)
 
         # plot nodes
         node_data = get_node_data(
@@ -418,10 +629,51 @@ class Network:
             title=f'NETWORK GRAPH FOR {self.text}' if print_title else None
         )
 
-        fig.show()
+        return fig
+
+    @instrumented('plot', attributes=['self.text'])
+    def plot(
+            self,
+            node_size: str = 'betweenness',
+            node_factor: float = 100.0,
+            node_alpha: int = 3,
+            plot_stats: bool = True,
+            print_title: bool = False,
+            plot_scatter: bool = False,
+            batched: bool = False):
+        """Plots network as plotly graph.
+
+        Args:
+            node_size (str, optional): Which network metric to use as node size. Defaults to 'betweenness'.
+            node_factor (float, optional): Customize the node size. Defaults to 100.0.
+            node_alpha (int, optional): Minimal node size. Defaults to 3.
+            plot_stats (bool, optional): Whether to plot the stats as `pandas.DataFrame`. Defaults to True.
+            print_title (bool, optional): Whether to plot the title of the plottet Text. Defaults to False.
+            plot_scatter (bool, optional): Whether to plot the annotations of the network as scatter plot. Defaults to False.
+            batched (bool, optional): Whether to draw all edges in a few traces, see `figure`. Defaults to False.
+        """
+        from IPython.display import display
+        from narrview.scatter import single_text_scatter
+
+        if plot_scatter:
+            single_text_scatter(
+                text=self.text,
+                tags=self.included_tags,
+                color_column='prop:addressee',
+                start_point=self.start_point,
+                end_point=self.end_point
+            ).show()
+
+        self.figure(
+            node_size=node_size,
+            node_factor=node_factor,
+            node_alpha=node_alpha,
+            print_title=print_title,
+            batched=batched
+        ).show()
 
         if plot_stats:
-            display(stats.head(5))
+            display(self.stats().head(5))
 
 
 if __name__ == '__main__':
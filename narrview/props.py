@@ -0,0 +1,107 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class PropColumn:
+    """Compact representation of a list-valued `prop:*` column: the values of row `i` are
+    `vocabulary[codes[offsets[i]:offsets[i + 1]]]`.
+    """
+    vocabulary: np.ndarray
+    offsets: np.ndarray
+    codes: np.ndarray
+
+    @classmethod
+    def from_lists(cls, values: Iterable[list]) -> 'PropColumn':
+        lookup = {}
+        lengths = []
+        codes = []
+        for row_values in values:
+            lengths.append(len(row_values))
+            for value in row_values:
+                codes.append(lookup.setdefault(value, len(lookup)))
+        vocabulary = np.empty(len(lookup), dtype=object)
+        vocabulary[:] = list(lookup)
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(vocabulary=vocabulary, offsets=offsets, codes=np.array(codes, dtype=np.int32))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def row(self, i: int) -> list:
+        return list(self.vocabulary[self.codes[self.offsets[i]:self.offsets[i + 1]]])
+
+    def to_lists(self) -> List[list]:
+        if not len(self):
+            return []
+        return [list(values) for values in np.split(self.vocabulary[self.codes], self.offsets[1:-1])]
+
+    def code(self, value: str) -> int:
+        """Returns the code of a value, or -1 if the value does not occur.
+        """
+        matches = np.flatnonzero(self.vocabulary == value)
+        return int(matches[0]) if len(matches) else -1
+
+    def gather(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the number of values of each given row and the positions of their codes in `codes`.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        lengths = self.offsets[rows + 1] - self.offsets[rows]
+        row_starts = np.repeat(self.offsets[rows], lengths)
+        within_row = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return lengths, row_starts + within_row
+
+    def take(self, rows: np.ndarray) -> 'PropColumn':
+        lengths, positions = self.gather(rows)
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return PropColumn(vocabulary=self.vocabulary, offsets=offsets, codes=self.codes[positions])
+
+    def contains(self, values: Iterable[str]) -> np.ndarray:
+        """Returns a boolean mask of the rows containing any of the values.
+        """
+        hits = np.isin(self.codes, [self.code(value) for value in values])
+        row_ids = np.repeat(np.arange(len(self)), self.lengths())
+        return np.bincount(row_ids[hits], minlength=len(self)) > 0
+
+
+def encode_props(annotation_df: pd.DataFrame, props: List[str] = None) -> Dict[str, PropColumn]:
+    """Encodes list-valued property columns as `PropColumn`s.
+
+    Args:
+        annotation_df (pd.DataFrame): Annotation DataFrame.
+        props (List[str], optional): The property columns. Defaults to None (all `prop:*` columns).
+
+    Returns:
+        Dict[str, PropColumn]: The encoded column per property.
+    """
+    if props is None:
+        props = [column for column in annotation_df.columns if column.startswith('prop:')]
+    return {prop: PropColumn.from_lists(annotation_df[prop]) for prop in props}
+
+
+def cartesian(columns: List[PropColumn], rows: np.ndarray) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """Combines the values of several property columns for the given rows, like exploding one column after
+    the other: one result per row and combination of values, rows with an empty property are dropped.
+
+    Args:
+        columns (List[PropColumn]): The property columns.
+        rows (np.ndarray): The rows to combine.
+
+    Returns:
+        Tuple[np.ndarray, List[np.ndarray]]: The row of each combination and the codes per column.
+    """
+    row_ids = np.asarray(rows, dtype=np.int64)
+    codes = []
+    for column in columns:
+        lengths, positions = column.gather(row_ids)
+        codes = [np.repeat(column_codes, lengths) for column_codes in codes]
+        codes.append(column.codes[positions])
+        row_ids = np.repeat(row_ids, lengths)
+    return row_ids, codes
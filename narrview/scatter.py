@@ -1,17 +1,14 @@
-import os
+from typing import TYPE_CHECKING, Dict
+import numpy as np
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+from narrview.instrument import instrumented
+from narrview.intervals import window_mask
+from narrview.props import PropColumn, cartesian
+from narrview.store import corpora, default_store, load_corpus, plays, stories
+from narrview.store import text_columns as store_text_columns
 
-
-plays = [
-    '1802-schroffenstein', '1806-krug', '1806-amphitryon', '1807-penthesilea',
-    '1808-kaethchen', '1808-hermannsschlacht', '1810-homburg'
-]
-stories = [
-    '1807-erdbeben', '1810-kohlhaas', '1811-zweikampf', '1808-marquise',
-    '1811-verlobung', '1811-findling', '1810-caecilie'
-]
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
 
 
 def format_annotation_text(text: str) -> str:
@@ -39,26 +36,121 @@ def format_annotation_text(text: str) -> str:
     return output_string
 
 
+def format_annotation_texts(annotations: pd.Series) -> pd.Series:
+    """Same as `format_annotation_text` for a whole column of annotation strings at once.
+
+    Args:
+        annotations (pd.Series): The annotation strings.
+
+    Returns:
+        pd.Series: The html strings.
+    """
+    text = annotations.str.replace(r' {2,}', ' ', regex=True)
+    word_counts = text.str.count(' ').to_numpy() + 1
+    # the first 60 words with a line break after every 10 words
+    lines = text.str.extract(r'^((?:[^ ]* ){0,59}[^ ]*)', expand=False).str.replace(
+        r'((?:[^ ]* ){9}[^ ]*) ', r'\1<br>', regex=True)
+    # one '<br>' after each of the 6 lines, empty ones included
+    line_counts = (np.minimum(word_counts, 60) + 9) // 10
+    breaks = np.array(['<br>' * i for i in range(8)])[7 - line_counts]
+    return '<I><br>' + lines + breaks + np.where(word_counts > 60, '[...]', '') + '</I>'
+
+
+def hover_texts(text: str, ids: list) -> Dict[int, str]:
+    """Returns the formatted hover texts of annotations by ID, for scatter plots created with `lazy_hover`
+    or `density_bins`.
+
+    Args:
+        text (str): The texts short title.
+        ids (list): Annotation IDs, i.e. rows of `AnnotationStore.document(text)`.
+
+    Returns:
+        Dict[int, str]: The html string per ID.
+    """
+    ids = [int(annotation_id) for annotation_id in ids]
+    annotations = default_store.document(text).annotation.iloc[ids]
+    return dict(zip(ids, format_annotation_texts(annotations)))
+
+
+def document_rows(text: str, annotation_df: pd.DataFrame) -> np.ndarray:
+    """Returns the row of `AnnotationStore.document(text)` of each annotation, matched by tag, start and end point,
+    so that annotation IDs are also right for re-indexed frames, e.g. from `narrview.streaming.stream_annotations`.
+
+    Raises:
+        ValueError: If an annotation is not part of the text.
+    """
+    document = default_store.document(text)
+    key_columns = ['tag', 'start_point', 'end_point']
+    document_keys = pd.MultiIndex.from_arrays([document[column].astype(str) for column in key_columns])
+    first = ~document_keys.duplicated()
+    rows = pd.Series(np.flatnonzero(first), index=document_keys[first]).reindex(
+        pd.MultiIndex.from_arrays([annotation_df[column].astype(str) for column in key_columns])
+    ).to_numpy()
+    if np.isnan(rows).any():
+        raise ValueError(f'The annotations are no annotations of "{text}"!')
+    return rows.astype(np.int64)
+
+
+def explode_props(df: pd.DataFrame, props: list, text_columns: bool = True) -> pd.DataFrame:
+    """Splits the given property columns in one row per property value. Multiple property columns
+    result in one row per combination of their values. Rows with empty property lists are dropped.
+
+    Args:
+        df (pd.DataFrame): Annotation DataFrame.
+        props (list): The property columns to split, e.g. ['prop:speaker', 'prop:addressee'].
+        text_columns (bool, optional): Whether to keep the context and annotation columns. If False, they are
+            dropped before splitting and can be joined back by the index. Defaults to True.
+
+    Returns:
+        pd.DataFrame: Modified DataFrame, indexed by the index of the annotation the row stems from.
+    """
+    props = list(dict.fromkeys(props))
+    if not text_columns:
+        df = df.drop(columns=[column for column in store_text_columns if column in df])
+    for prop in props:
+        df = df.explode(prop)
+
+    return df.dropna(subset=props)
+
+
+def explode_prop_columns(
+        df: pd.DataFrame,
+        prop_columns: Dict[str, PropColumn],
+        text_columns: bool = True) -> pd.DataFrame:
+    """Same as `explode_props`, but takes the property values from `PropColumn`s whose rows correspond to the rows
+    of the DataFrame, so that no property lists are materialized.
+
+    Args:
+        df (pd.DataFrame): Annotation DataFrame.
+        prop_columns (Dict[str, PropColumn]): The encoded property columns to split.
+        text_columns (bool, optional): Whether to keep the context and annotation columns. Defaults to True.
+
+    Returns:
+        pd.DataFrame: Modified DataFrame, indexed by the index of the annotation the row stems from.
+    """
+    if not text_columns:
+        df = df.drop(columns=[column for column in store_text_columns if column in df])
+    rows, codes = cartesian(list(prop_columns.values()), np.arange(len(df)))
+    exploded_df = df.iloc[rows].copy()
+    for (prop, prop_column), prop_codes in zip(prop_columns.items(), codes):
+        exploded_df[prop] = prop_column.vocabulary[prop_codes]
+    return exploded_df
+
+
 def split_by_prop(df: pd.DataFrame, prop: str = 'prop:character_speech') -> pd.DataFrame:
     """Splits a specified property column in annotation dataframes in multiple rows if multiple property values exists.
 
     Args:
         df (pd.DataFrame): Annotation DataFrame.
-        prop (str, optional): [description]. Defaults to 'prop:character_speech'.
+        prop (str, optional): The property column to split. Defaults to 'prop:character_speech'.
 
     Returns:
         pd.DataFrame: Modiefied DataFrame.
     """
-    output_list = []
-    for _, row in df.iterrows():
-        row_dict = dict(row)
-        for item in row[prop]:
-            row_dict[prop] = item
-            output_list.append(row_dict)
-
-    return pd.DataFrame(output_list)
+    return explode_props(df=df, props=[prop]).reset_index(drop=True)
 
 
+@instrumented('scatter', attributes=['corpus'])
 def subcorpus_scatter(
         corpus: str = 'Novellas',
         tags: list = ['secondary_narration'],
@@ -66,29 +158,25 @@ def subcorpus_scatter(
     """Plots annotation for the given corpus.
 
     Args:
-        corpus (str, optional): Which corpus to plot. Defaults to 'Novellas'.
+        corpus (str, optional): Which corpus to plot: 'Novellas', 'Dramas' or 'All'. Defaults to 'Novellas'.
         tags (list, optional): A list of all tags to be included in the scatter plot. 'direct_speech', 'indirect_speech',
         'narrated_character_speech', 'secondary_narration' or 'tertiary_narration'. Defaults to ['secondary_narration'].
         color_column (str, optional): Either 'tag', 'prop:informativeness', 'prop:falsification_status'
         or 'prop:relation_narrator-event_time'. Defaults to 'prop:speech_representation'.
     """
-    sum_df = pd.DataFrame()
-    for file in os.listdir(f'Annotations{corpus}/'):
-        loaded_df = pd.read_json(f'Annotations{corpus}/{file}')
-        sum_df = sum_df.append(
-            loaded_df[loaded_df['tag'].isin(tags)],
-            ignore_index=True
-        )
+    import plotly.express as px
 
-    sum_df = sum_df[sum_df.tag.isin(tags)].copy()
+    if corpus not in corpora:
+        raise ValueError(f'"{corpus}" is no valid corpus! Choose one of {", ".join(corpora)}.')
+
+    sum_df = load_corpus(texts=sorted(corpora[corpus]), tags=tags)
     sum_df['size'] = sum_df['end_point'] - sum_df['start_point']
-    sum_df['Annotation'] = [format_annotation_text(
-        an) for an in sum_df['annotation']]
-    if 'prop:' in color_column:
-        sum_df = split_by_prop(
-            df=sum_df,
-            prop=color_column
-        )
+    sum_df['Annotation'] = format_annotation_texts(sum_df['annotation'])
+    sum_df = explode_props(
+        df=sum_df,
+        props=[column for column in [color_column] if 'prop:' in column],
+        text_columns=False
+    )
 
     title_tags = [f'<{tag}>' for tag in tags]
     fig = px.scatter(
@@ -106,23 +194,41 @@ def subcorpus_scatter(
     return fig
 
 
-def get_text_part(annotation_df: pd.DataFrame, sp: float = 0, ep: float = 1) -> pd. DataFrame:
+def get_text_part(
+        annotation_df: pd.DataFrame,
+        sp: float = 0,
+        ep: float = 1,
+        mode: str = 'contained') -> pd. DataFrame:
+    """Selects the annotations of a text part given as fractions of the maximal end point in the DataFrame.
+
+    Args:
+        annotation_df (pd.DataFrame): Annotation DataFrame.
+        sp (float, optional): Start of the text part. Defaults to 0.
+        ep (float, optional): End of the text part. Defaults to 1.
+        mode (str, optional): 'start', 'contained' or 'overlap', see `narrview.intervals.IntervalIndex.query`.
+            Defaults to 'contained'.
+
+    Returns:
+        pd.DataFrame: The annotations of the text part.
+    """
     max_end_point = max(annotation_df.end_point)
-    abs_start_point = sp * max_end_point
-    abs_end_point = ep * max_end_point
     return annotation_df[
-        (annotation_df.start_point >= abs_start_point) &
-        (annotation_df.end_point <= abs_end_point)
+        window_mask(annotation_df, abs_start_point=sp * max_end_point, abs_end_point=ep * max_end_point, mode=mode)
     ].copy()
 
 
+@instrumented('scatter', attributes=['text'])
 def single_text_scatter(
         text: str = '1807-penthesilea',
         tags: list = ['secondary_narration'],
         y_column: str = 'prop:speaker',
         color_column: str = 'prop:relation_narrator-event_time',
         start_point: float = 0,
-        end_point: float = 1.0) -> go.Figure:
+        end_point: float = 1.0,
+        window_mode: str = 'contained',
+        annotation_df: pd.DataFrame = None,
+        density_bins: int = None,
+        lazy_hover: bool = False) -> 'go.Figure':
     """Plot the annotation of a single text as a plotly scatter plot.
 
     Args:
@@ -135,54 +241,142 @@ def single_text_scatter(
             Defaults to 'prop:speaker'.
         color_column (str, optional): Either 'tag', 'prop:informativeness', 'prop:falsification_status'
             or 'prop:relation_narrator-event_time'. Defaults to 'prop:relation_narrator-event_time'.
+        start_point (float, optional): Start of the plotted text part as fraction of the annotated text length. Defaults to 0.
+        end_point (float, optional): End of the plotted text part as fraction of the annotated text length. Defaults to 1.0.
+        window_mode (str, optional): Which annotations belong to the text part: 'start', 'contained' or 'overlap',
+            see `narrview.intervals.IntervalIndex.query`. Defaults to 'contained'.
+        annotation_df (pd.DataFrame, optional): Annotations of the text to plot instead of all annotations,
+            e.g. search results. Defaults to None.
+        density_bins (int, optional): Bins the annotations along the window per y and color value and plots one marker
+            per bin sized by the number of annotations, see `density_scatter`. Defaults to None (one marker per annotation).
+        lazy_hover (bool, optional): Whether to leave out the annotation texts and only attach the annotation IDs as
+            `customdata`, to be resolved with `hover_texts`. Defaults to False.
 
     Returns:
-        [type]: [description]
+        go.Figure: The scatter plot.
     """
-    if text in stories:
-        sum_df = pd.read_json(
-            f'AnnotationsNovellas/{text}_embedded_narrations.json')
-    elif text in plays:
-        sum_df = pd.read_json(
-            f'AnnotationsDramas/{text}_embedded_narrations.json')
+    import plotly.express as px
+
+    props = [column for column in [color_column, y_column] if 'prop:' in column]
+    if annotation_df is None:
+        positions = default_store.positions(
+            text=text,
+            tags=tags,
+            start_point=start_point,
+            end_point=end_point,
+            mode=window_mode
+        )
+        sum_df = default_store.document(text).iloc[positions].copy()
+        prop_columns = {
+            prop: default_store.prop_columns(text)[prop].take(positions)
+            for prop in dict.fromkeys(props)
+        }
     else:
-        raise ValueError(f'"{text}" is no valid title!')
-
-    sum_df = sum_df[sum_df.tag.isin(tags)].copy()
-    sum_df = get_text_part(annotation_df=sum_df, sp=start_point, ep=end_point)
+        sum_df = default_store.select(
+            annotation_df=annotation_df,
+            text=text,
+            tags=tags,
+            start_point=start_point,
+            end_point=end_point,
+            mode=window_mode
+        )
 
     sum_df['size'] = sum_df['end_point'] - sum_df['start_point']
-    sum_df['Annotation'] = [format_annotation_text(
-        an) for an in sum_df['annotation']]
+    # annotation IDs are rows of the cached document, resolved by `hover_texts`
+    sum_df['id'] = sum_df.index if annotation_df is None else document_rows(text, sum_df)
+    if not lazy_hover and density_bins is None:
+        sum_df['Annotation'] = format_annotation_texts(sum_df['annotation'])
 
-    if 'prop:' in color_column:
-        sum_df = split_by_prop(
+    if annotation_df is None:
+        sum_df = explode_prop_columns(
             df=sum_df,
-            prop=color_column
+            prop_columns=prop_columns,
+            text_columns=False
         )
-
-    if 'prop:' in y_column:
-        sum_df = split_by_prop(
+    else:
+        sum_df = explode_props(
             df=sum_df,
-            prop=y_column
+            props=props,
+            text_columns=False
         )
 
+    title = f'{", ".join(tags)} in Kleist\'s {text.upper()}'
     height = (len(sum_df[y_column].unique()) * 30) + 300
     # if len(sum_df[y_column].unique()) > 10 else 1000
-    fig = px.scatter(
-        sum_df,
-        y=y_column,
-        x='start_point',
-        color=color_column,
-        size='size',
-        hover_data=['Annotation'],
-        title=f'{", ".join(tags)} in Kleist\'s {text.upper()}',
-        marginal_x='histogram',
-        marginal_y='histogram',
-    )
+    if density_bins is not None:
+        fig = density_scatter(
+            sum_df=sum_df,
+            y_column=y_column,
+            color_column=color_column,
+            window=default_store.window(text=text, start_point=start_point, end_point=end_point),
+            bins=density_bins,
+            title=title
+        )
+    else:
+        fig = px.scatter(
+            sum_df,
+            y=y_column,
+            x='start_point',
+            color=color_column,
+            size='size',
+            hover_data=None if lazy_hover else ['Annotation'],
+            custom_data=['id'] if lazy_hover else None,
+            title=title,
+            marginal_x='histogram',
+            marginal_y='histogram',
+        )
     fig.update_layout(
         template="simple_white",
         width=1000,
         height=height
     )
     return fig
+
+
+def density_scatter(
+        sum_df: pd.DataFrame,
+        y_column: str,
+        color_column: str,
+        window: tuple,
+        bins: int = 100,
+        title: str = None) -> 'go.Figure':
+    """Plots one marker per y value, color value and position bin instead of one marker per annotation.
+
+    Args:
+        sum_df (pd.DataFrame): The exploded annotations with 'start_point', 'size' (length) and 'id'.
+        y_column (str): Column of the y values.
+        color_column (str): Column of the colors.
+        window (tuple): The plotted window as character offsets.
+        bins (int, optional): Number of bins across the window. Defaults to 100.
+        title (str, optional): The figure title. Defaults to None.
+
+    Returns:
+        go.Figure: The scatter plot. Marker sizes are annotation counts, hover texts show counts and summed lengths,
+            `customdata` holds the comma-separated annotation IDs of each bin, to be resolved with `hover_texts`.
+    """
+    import plotly.express as px
+
+    abs_start_point, abs_end_point = window
+    bin_width = max(abs_end_point - abs_start_point, 1) / bins
+    position_bins = np.clip(
+        ((sum_df['start_point'] - abs_start_point) // bin_width).astype(int), 0, bins - 1)
+    density_df = sum_df.assign(bin=position_bins).groupby(
+        list(dict.fromkeys([y_column, color_column, 'bin'])), observed=True, sort=False
+    ).agg(
+        count=('size', 'size'),
+        length=('size', 'sum'),
+        ids=('id', lambda ids: ','.join(map(str, ids)))
+    ).reset_index()
+    density_df['start_point'] = abs_start_point + (density_df['bin'] + 0.5) * bin_width
+
+    fig = px.scatter(
+        density_df,
+        y=y_column,
+        x='start_point',
+        color=color_column,
+        size='count',
+        hover_data={'count': True, 'length': True, 'start_point': False},
+        custom_data=['ids'],
+        title=title
+    )
+    return fig
@@ -0,0 +1,267 @@
+"""Inverted index over the annotation strings and the plain texts of the corpus.
+
+Usage:
+    python -m narrview.search --output narrview_search.pkl
+
+Tokens are normalized German-aware (lower case, umlauts as 'ae', 'oe', 'ue', 'ß' as 'ss'), so that 'Pferde' also
+finds 'pferde' and 'daß' also finds 'dass'. Annotation results are rows of the annotation files and can be passed
+to `single_text_scatter` or `Network` as `annotation_df`.
+"""
+import argparse
+import os
+import pickle
+import re
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from narrview.store import AnnotationStore, annotation_path, default_store, file_signature, plays, stories, text_path
+
+
+default_output = 'narrview_search.pkl'
+token_pattern = re.compile(r'\w+')
+umlauts = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'})
+
+
+def normalize(token: str) -> str:
+    """Normalizes a token: lower case, umlauts and 'ß' transcribed, remaining diacritics removed.
+    """
+    token = token.lower().translate(umlauts)
+    return ''.join(
+        char for char in unicodedata.normalize('NFKD', token) if not unicodedata.combining(char)
+    )
+
+
+def tokenize(text: str) -> List[str]:
+    return [normalize(token) for token in token_pattern.findall(text)]
+
+
+class SearchIndex:
+    def __init__(self, texts: List[str], store: AnnotationStore = default_store):
+        """Builds the inverted index for the given texts.
+
+        Args:
+            texts (List[str]): The texts short titles.
+            store (AnnotationStore, optional): The store the annotations are loaded from. Defaults to `default_store`.
+        """
+        self.texts = list(texts)
+        self.store = store
+        self.signatures = {}
+        annotation_postings = {}
+        text_postings = {}
+        rows = []
+        for document_id, text in enumerate(self.texts):
+            annotation_df = store.document(text)
+            for row, (tag, annotation) in enumerate(zip(annotation_df.tag, annotation_df.annotation)):
+                if tag == 'primary_narration':
+                    continue
+                annotation_id = len(rows)
+                rows.append((document_id, row))
+                for term in set(tokenize(annotation)):
+                    annotation_postings.setdefault(term, []).append(annotation_id)
+
+            with open(text_path(text=text, root=store.root), encoding='utf-8') as text_file:
+                plain_text = text_file.read()
+            for match in token_pattern.finditer(plain_text):
+                text_postings.setdefault(normalize(match.group()), []).append(
+                    (document_id, match.start(), match.end()))
+
+            self.signatures[text] = (
+                file_signature(annotation_path(text=text, root=store.root)),
+                file_signature(text_path(text=text, root=store.root))
+            )
+
+        self.rows = np.array(rows, dtype=np.int64).reshape(-1, 2)
+        self.annotation_postings = {
+            term: np.array(ids, dtype=np.int64) for term, ids in annotation_postings.items()
+        }
+        self.text_postings = {
+            term: np.array(hits, dtype=np.int64) for term, hits in text_postings.items()
+        }
+        self.vocabulary = sorted(set(self.annotation_postings) | set(self.text_postings))
+
+    def is_current(self) -> bool:
+        """Whether none of the indexed annotation and text files changed since the index was built.
+        """
+        return all(
+            self.signatures[text] == (
+                file_signature(annotation_path(text=text, root=self.store.root)),
+                file_signature(text_path(text=text, root=self.store.root))
+            )
+            for text in self.texts
+        )
+
+    def save(self, path: str = default_output) -> None:
+        store, self.store = self.store, None
+        try:
+            with open(path, 'wb') as index_file:
+                pickle.dump(self, index_file, protocol=pickle.HIGHEST_PROTOCOL)
+        finally:
+            self.store = store
+
+    @classmethod
+    def load(cls, path: str = default_output, store: AnnotationStore = default_store) -> 'SearchIndex':
+        with open(path, 'rb') as index_file:
+            index = pickle.load(index_file)
+        index.store = store
+        return index
+
+    @classmethod
+    def load_or_build(
+            cls,
+            path: str = default_output,
+            texts: Optional[List[str]] = None,
+            store: AnnotationStore = default_store) -> 'SearchIndex':
+        """Loads the persisted index, or builds and persists it if it is missing or outdated.
+        """
+        if os.path.exists(path):
+            index = cls.load(path=path, store=store)
+            if (texts is None or set(texts) <= set(index.texts)) and index.is_current():
+                return index
+        index = cls(texts=texts or plays + stories, store=store)
+        index.save(path)
+        return index
+
+    def _terms(self, token: str, prefix: bool) -> List[str]:
+        if not prefix:
+            return [token]
+        start = bisect_left(self.vocabulary, token)
+        terms = []
+        for term in self.vocabulary[start:]:
+            if not term.startswith(token):
+                break
+            terms.append(term)
+        return terms
+
+    def _matches(self, postings: Dict[str, np.ndarray], query: str, prefix: bool) -> Optional[list]:
+        """Returns the postings per query token, with all terms matching a token merged.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            raise ValueError('The query contains no words.')
+        matches = []
+        for token in tokens:
+            arrays = [postings[term] for term in self._terms(token, prefix) if term in postings]
+            if not arrays:
+                return None
+            matches.append(np.concatenate(arrays))
+        return matches
+
+    def search(
+            self,
+            query: str,
+            texts: Optional[List[str]] = None,
+            tags: Optional[List[str]] = None,
+            start_point: Optional[int] = None,
+            end_point: Optional[int] = None,
+            props: Optional[Dict[str, str]] = None,
+            prefix: bool = False) -> pd.DataFrame:
+        """Finds all annotations whose annotation string contains every word of the query.
+
+        Args:
+            query (str): One or more words.
+            texts (List[str], optional): Only search these texts. Defaults to None (all indexed texts).
+            tags (List[str], optional): Only return annotations with these tags. Defaults to None (all tags).
+            start_point (int, optional): Only return annotations ending at or after this character offset. Defaults to None.
+            end_point (int, optional): Only return annotations starting at or before this character offset. Defaults to None.
+            props (Dict[str, str], optional): Property filters, e.g. {'prop:speaker': 'Kohlhaas'}: only return annotations
+                having the value in the property's list. Defaults to None.
+            prefix (bool, optional): Whether query words also match longer words starting with them. Defaults to False.
+
+        Returns:
+            pd.DataFrame: The matching annotation rows, including 'document'.
+        """
+        matches = self._matches(self.annotation_postings, query, prefix)
+        columns = self.store.document_columns(self.texts[0])
+        if matches is None:
+            return pd.DataFrame(columns=columns)
+        annotation_ids = matches[0]
+        for ids in matches[1:]:
+            annotation_ids = np.intersect1d(annotation_ids, ids)
+        annotation_ids = np.unique(annotation_ids)
+
+        parts = []
+        rows = self.rows[annotation_ids]
+        for document_id in np.unique(rows[:, 0]):
+            text = self.texts[document_id]
+            if texts is not None and text not in texts:
+                continue
+            annotation_df = self.store.document(text)
+            positions = rows[rows[:, 0] == document_id, 1]
+            if tags is not None:
+                positions = positions[annotation_df.tag.isin(tags).to_numpy()[positions]]
+            if start_point is not None:
+                positions = positions[annotation_df.end_point.to_numpy()[positions] >= start_point]
+            if end_point is not None:
+                positions = positions[annotation_df.start_point.to_numpy()[positions] <= end_point]
+            for prop, value in (props or {}).items():
+                positions = positions[self.store.prop_columns(text)[prop].contains([value])[positions]]
+            parts.append(self.store.rows(text=text, positions=positions))
+
+        if not parts:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(parts).copy()
+
+    def search_text(
+            self,
+            query: str,
+            texts: Optional[List[str]] = None,
+            prefix: bool = False) -> pd.DataFrame:
+        """Finds all occurrences of the query words in the plain texts.
+
+        Args:
+            query (str): One or more words. Occurrences of all of them are returned for texts containing every word.
+            texts (List[str], optional): Only search these texts. Defaults to None (all indexed texts).
+            prefix (bool, optional): Whether query words also match longer words starting with them. Defaults to False.
+
+        Returns:
+            pd.DataFrame: One row per occurrence with 'document', 'start_point' and 'end_point' as character offsets
+                into the plain text, which are aligned with the offsets of the annotations.
+        """
+        matches = self._matches(self.text_postings, query, prefix)
+        if matches is None:
+            return pd.DataFrame(columns=['document', 'start_point', 'end_point'])
+        documents = set(self.texts) if texts is None else set(texts)
+        for hits in matches:
+            documents &= {self.texts[document_id] for document_id in np.unique(hits[:, 0])}
+        hits = np.concatenate(matches)
+        hits = hits[np.isin(hits[:, 0], [self.texts.index(text) for text in documents])]
+        hits = hits[np.lexsort((hits[:, 1], hits[:, 0]))]
+        return pd.DataFrame(
+            {
+                'document': [self.texts[document_id] for document_id in hits[:, 0]],
+                'start_point': hits[:, 1],
+                'end_point': hits[:, 2],
+            }
+        )
+
+    def annotations_at(self, hits: pd.DataFrame, tags: Optional[List[str]] = None) -> pd.DataFrame:
+        """Returns the annotations overlapping text hits of `search_text`.
+        """
+        parts = []
+        for text, text_hits in hits.groupby('document', sort=False):
+            index = self.store.interval_index(text)
+            positions = np.unique(
+                np.concatenate(
+                    [
+                        index.query(start, end, mode='overlap')
+                        for start, end in zip(text_hits.start_point, text_hits.end_point)
+                    ]
+                )
+            )
+            if tags is not None:
+                positions = positions[self.store.document(text).tag.isin(tags).to_numpy()[positions]]
+            parts.append(self.store.rows(text=text, positions=positions))
+        if not parts:
+            return pd.DataFrame(columns=self.store.document_columns(self.texts[0]))
+        return pd.concat(parts).copy()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Build the search index over the annotations and plain texts.')
+    parser.add_argument('--output', default=default_output, help='output file')
+    args = parser.parse_args()
+    SearchIndex(texts=plays + stories).save(args.output)
+    print(args.output)
@@ -0,0 +1,333 @@
+"""Local HTTP service answering edge, stats, layout and scatter queries as JSON.
+
+Usage:
+    python -m narrview.serve --port 8050 --processes 4
+
+Endpoints (GET, parameters as query string):
+    /texts      the available texts
+    /edges      text, network_annotations, start_point, end_point, window_mode
+    /stats      same as /edges, plus metrics (comma-separated), backend
+    /layout     same as /edges, plus layout (a networkx layout name, e.g. 'kamada_kawai')
+    /scatter    text, tags (comma-separated), y_column, color_column, start_point, end_point, window_mode,
+                density_bins, lazy_hover ('1' to leave out the annotation texts)
+    /hover      text, ids (comma-separated annotation IDs from the `customdata` of lazy or density scatter plots)
+
+The corpus is kept in memory in the server and in every worker process. Results are kept in an LRU cache, identical
+concurrent queries share one computation, and layouts, network stats and scatter figures are computed in a process
+pool, so that the event loop only parses requests and writes responses.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+import networkx as nx
+from narrview.intervals import check_mode, check_window
+from narrview.layout import compute_layout, layout_function
+from narrview.metrics import backends, network_stats, stats_metrics
+from narrview.network import create_network_from_edges, get_edge_frame, get_edges, network_tags
+from narrview.store import corpora, default_store, preload
+
+
+logger = logging.getLogger('narrview.serve')
+
+reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class UnknownEndpoint(Exception):
+    pass
+
+
+def window_params(params: dict) -> dict:
+    start_point = float(params.get('start_point', 0))
+    end_point = float(params.get('end_point', 1.0))
+    check_window(start_point, end_point)
+    window_mode = params.get('window_mode', 'start')
+    check_mode(window_mode)
+    return {'start_point': start_point, 'end_point': end_point, 'window_mode': window_mode}
+
+
+def network_params(params: dict) -> dict:
+    text = params.get('text', '1810-kohlhaas')
+    default_store.path(text)     # validates the title
+    network_annotations = params.get('network_annotations', 'character_speech')
+    if network_annotations not in network_tags:
+        raise ValueError(
+            f'"{network_annotations}" is no valid annotation type! Choose one of {", ".join(network_tags)}.')
+    return {'text': text, 'network_annotations': network_annotations, **window_params(params)}
+
+
+def network_graph(params: dict) -> nx.DiGraph:
+    return create_network_from_edges(list(get_edges(
+        text=params['text'],
+        network_annotations=params['network_annotations'],
+        start_point=params['start_point'],
+        end_point=params['end_point'],
+        window_mode=params['window_mode']
+    )))
+
+
+def edges_result(params: dict) -> list:
+    edge_df = get_edge_frame(
+        text=params['text'],
+        network_annotations=params['network_annotations'],
+        start_point=params['start_point'],
+        end_point=params['end_point'],
+        window_mode=params['window_mode']
+    )
+    return [
+        {
+            'speaker': speaker,
+            'addressee': addressee,
+            'weight': int(weight),
+            'text': list(texts),
+            'start_point': [int(start_point) for start_point in start_points]
+        }
+        for speaker, addressee, weight, texts, start_points in zip(
+            edge_df.speaker, edge_df.addressee, edge_df.weight, edge_df.text, edge_df.start_point)
+    ]
+
+
+def stats_result(params: dict) -> list:
+    stats_df = network_stats(network_graph(params), metrics=params['metrics'], backend=params['backend'])
+    return stats_df.rename_axis('character').reset_index().to_dict(orient='records')
+
+
+def layout_result(params: dict) -> dict:
+    network_layout = layout_function(params['layout'])
+    pos = compute_layout(network_graph(params), network_layout=network_layout)
+    return {node: [float(x), float(y)] for node, (x, y) in pos.items()}
+
+
+def scatter_result(params: dict) -> bytes:
+    from narrview.scatter import single_text_scatter
+
+    fig = single_text_scatter(
+        text=params['text'],
+        tags=params['tags'],
+        y_column=params['y_column'],
+        color_column=params['color_column'],
+        start_point=params['start_point'],
+        end_point=params['end_point'],
+        window_mode=params['window_mode'],
+        density_bins=params['density_bins'],
+        lazy_hover=params['lazy_hover']
+    )
+    # the figure is already JSON, so that the event loop does not need to decode and encode it again
+    return fig.to_json().encode('utf-8')
+
+
+def hover_result(params: dict) -> dict:
+    from narrview.scatter import hover_texts
+
+    return hover_texts(text=params['text'], ids=params['ids'])
+
+
+def parse_stats(params: dict) -> dict:
+    metrics = params['metrics'].split(',') if params.get('metrics') else stats_metrics
+    for metric in metrics:
+        if metric not in stats_metrics:
+            raise ValueError(f'"{metric}" is no valid metric! Choose one of {", ".join(stats_metrics)}.')
+    backend = params.get('backend', 'networkx')
+    if backend not in backends:
+        raise ValueError(f'"{backend}" is no valid backend! Choose one of {", ".join(backends)}.')
+    return {**network_params(params), 'metrics': metrics, 'backend': backend}
+
+
+def parse_layout(params: dict) -> dict:
+    layout = params.get('layout', 'kamada_kawai')
+    layout_function(layout)     # validates the layout
+    return {**network_params(params), 'layout': layout}
+
+
+def parse_scatter(params: dict) -> dict:
+    text = params.get('text', '1807-penthesilea')
+    default_store.path(text)
+    tags = params.get('tags', 'secondary_narration').split(',')
+    text_tags = sorted(default_store.document(text).tag.unique())
+    for tag in tags:
+        if tag not in text_tags:
+            raise ValueError(f'"{tag}" is no valid tag! Choose from {", ".join(text_tags)}.')
+    columns = ['tag'] + list(default_store.prop_columns(text))
+    y_column = params.get('y_column', 'prop:speaker')
+    color_column = params.get('color_column', 'prop:relation_narrator-event_time')
+    for column in [y_column, color_column]:
+        if column not in columns:
+            raise ValueError(f'"{column}" is no valid column! Choose one of {", ".join(columns)}.')
+    density_bins = int(params['density_bins']) if params.get('density_bins') else None
+    if density_bins is not None and density_bins <= 0:
+        raise ValueError(f'"{density_bins}" is no valid number of density bins! Use a positive number.')
+    return {
+        'text': text,
+        'tags': tags,
+        'y_column': y_column,
+        'color_column': color_column,
+        'density_bins': density_bins,
+        'lazy_hover': params.get('lazy_hover', '0') == '1',
+        **window_params(params)
+    }
+
+
+def parse_hover(params: dict) -> dict:
+    text = params.get('text', '1810-kohlhaas')
+    default_store.path(text)
+    ids = [int(annotation_id) for annotation_id in params.get('ids', '').split(',') if annotation_id]
+    if any(not 0 <= annotation_id < len(default_store.document(text)) for annotation_id in ids):
+        raise ValueError(f'"{params["ids"]}" are no valid annotation IDs!')
+    return {'text': text, 'ids': ids}
+
+
+def encoded_result(compute: Callable[[dict], object], params: dict) -> bytes:
+    """Computes a result and encodes it as JSON, in the process pool for offloaded endpoints.
+    Results that are already encoded are returned as they are.
+    """
+    result = compute(params)
+    if isinstance(result, bytes):
+        return result
+    return json.dumps(result).encode('utf-8')
+
+
+# endpoint -> (parameter parser, result function, whether the result is computed in the process pool)
+endpoints: Dict[str, Tuple[Callable[[dict], dict], Callable[[dict], object], bool]] = {
+    '/edges': (network_params, edges_result, False),
+    '/stats': (parse_stats, stats_result, True),
+    '/layout': (parse_layout, layout_result, True),
+    '/scatter': (parse_scatter, scatter_result, True),
+    '/hover': (parse_hover, hover_result, False),
+}
+
+
+class ResultCache:
+    def __init__(self, maxsize: int = 1024):
+        """LRU cache of encoded results. Pending computations are cached as futures, so that identical
+        concurrent queries wait for the same result.
+        """
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+
+    async def get(self, key: tuple, compute: Callable[[], 'asyncio.Future']) -> bytes:
+        future = self._cache.get(key)
+        if future is None:
+            future = asyncio.ensure_future(compute())
+            self._cache[key] = future
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        self._cache.move_to_end(key)
+        try:
+            return await asyncio.shield(future)
+        except Exception:
+            # failed computations are not cached
+            if self._cache.get(key) is future:
+                del self._cache[key]
+            raise
+
+
+class NarrviewServer:
+    def __init__(self, executor: Executor, cache_size: int = 1024):
+        """Asyncio HTTP/1.1 server for the narrview endpoints.
+
+        Args:
+            executor (Executor): Executor for CPU-heavy results, usually a `ProcessPoolExecutor`.
+            cache_size (int, optional): Maximal number of cached results. Defaults to 1024.
+        """
+        self.executor = executor
+        self.cache = ResultCache(maxsize=cache_size)
+
+    async def result(self, path: str, params: dict) -> bytes:
+        if path == '/texts':
+            return json.dumps(corpora).encode('utf-8')
+        if path not in endpoints:
+            raise UnknownEndpoint(path)
+        parse, compute, offload = endpoints[path]
+        parsed = parse(params)
+        key = (path, json.dumps(parsed, sort_keys=True))
+
+        async def result() -> bytes:
+            if offload:
+                return await asyncio.get_running_loop().run_in_executor(
+                    self.executor, encoded_result, compute, parsed)
+            return encoded_result(compute, parsed)
+
+        return await self.cache.get(key, result)
+
+    async def respond(self, writer: asyncio.StreamWriter, status: int, body: bytes, keep_alive: bool) -> None:
+        writer.write(
+            (
+                f'HTTP/1.1 {status} {reasons[status]}\r\n'
+                'Content-Type: application/json\r\n'
+                f'Content-Length: {len(body)}\r\n'
+                'Access-Control-Allow-Origin: *\r\n'
+                f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'
+            ).encode('latin-1') + body
+        )
+        await writer.drain()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self.respond(writer, 400, b'{"error": "Malformed request line."}', keep_alive=False)
+                    break
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+
+                if method != 'GET':
+                    status, body = 405, json.dumps({'error': f'"{method}" is not allowed.'}).encode('utf-8')
+                else:
+                    url = urlsplit(target)
+                    params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                    try:
+                        status, body = 200, await self.result(url.path, params)
+                    except UnknownEndpoint:
+                        status, body = 404, json.dumps({'error': f'"{url.path}" is no valid endpoint!'}).encode('utf-8')
+                    except ValueError as error:
+                        status, body = 400, json.dumps({'error': str(error)}).encode('utf-8')
+                    except Exception:
+                        logger.exception('Request %s failed.', target)
+                        status, body = 500, b'{"error": "Internal server error."}'
+                await self.respond(writer, status, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8050) -> None:
+        server = await asyncio.start_server(self.handle, host=host, port=port)
+        logger.info('Serving on http://%s:%s', host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main(host: str = '127.0.0.1', port: int = 8050, processes: Optional[int] = None, cache_size: int = 1024) -> None:
+    preload()
+    with ProcessPoolExecutor(max_workers=processes or os.cpu_count(), initializer=preload) as executor:
+        asyncio.run(NarrviewServer(executor=executor, cache_size=cache_size).serve(host=host, port=port))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve narrview queries over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8050)
+    parser.add_argument('--processes', type=int, default=None, help='worker processes, defaults to one per CPU')
+    parser.add_argument('--cache-size', type=int, default=1024, help='maximal number of cached results')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    main(host=args.host, port=args.port, processes=args.processes, cache_size=args.cache_size)
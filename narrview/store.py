@@ -0,0 +1,552 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+from narrview.instrument import instrumented, span
+from narrview.intervals import IntervalIndex, check_mode, window_mask
+from narrview.props import PropColumn, encode_props
+
+
+plays = [
+    '1802-schroffenstein', '1806-krug', '1806-amphitryon', '1807-penthesilea',
+    '1808-kaethchen', '1808-hermannsschlacht', '1810-homburg'
+]
+stories = [
+    '1807-erdbeben', '1810-kohlhaas', '1811-zweikampf', '1808-marquise',
+    '1811-verlobung', '1811-findling', '1810-caecilie'
+]
+corpora = {
+    'Dramas': plays,
+    'Novellas': stories,
+    'All': plays + stories
+}
+
+# texts outside of the bundled corpus, e.g. generated by `narrview.synthetic`: text -> 'Dramas' or 'Novellas'
+registered_texts = {}
+
+text_columns = ['left_context', 'annotation', 'right_context']
+context_columns = ['left_context', 'right_context']
+
+
+def annotation_path(text: str, root: str = '.') -> str:
+    """Returns the path of the annotation file for the given text.
+
+    Args:
+        text (str): The texts short title, e.g. '1810-kohlhaas'.
+        root (str, optional): The repository root. Defaults to '.'.
+
+    Raises:
+        ValueError: If the title is neither one of the plays nor one of the stories nor registered.
+
+    Returns:
+        str: Path to the `*_embedded_narrations.json` file.
+    """
+    if text in registered_texts:
+        return os.path.join(root, f'Annotations{registered_texts[text]}/{text}_embedded_narrations.json')
+    if text in stories:
+        return os.path.join(root, f'AnnotationsNovellas/{text}_embedded_narrations.json')
+    elif text in plays:
+        return os.path.join(root, f'AnnotationsDramas/{text}_embedded_narrations.json')
+    raise ValueError(f'"{text}" is no valid title!')
+
+
+def text_path(text: str, root: str = '.') -> str:
+    """Returns the path of the plain text file for the given text.
+    """
+    if text in registered_texts:
+        return os.path.join(root, f'Texts/{registered_texts[text]}/{text}.txt')
+    if text in stories:
+        return os.path.join(root, f'Texts/Novellas/{text}.txt')
+    elif text in plays:
+        return os.path.join(root, f'Texts/Dramas/{text}.txt')
+    raise ValueError(f'"{text}" is no valid title!')
+
+
+def register_texts(texts: Iterable[str], corpus: str = 'Novellas') -> None:
+    """Makes texts outside of the bundled corpus loadable. Their files are expected in the same layout,
+    i.e. `Annotations{corpus}/{text}_embedded_narrations.json` and `Texts/{corpus}/{text}.txt`.
+    """
+    if corpus not in ['Dramas', 'Novellas']:
+        raise ValueError(f'"{corpus}" is no valid corpus! Choose either "Dramas" or "Novellas".')
+    for text in texts:
+        registered_texts[text] = corpus
+
+
+def file_signature(path: str) -> tuple:
+    """Returns the modification time and the size of a file, which change whenever the file is rewritten.
+    """
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def drop_primary_text(annotation_df: pd.DataFrame) -> pd.DataFrame:
+    """Empties the text columns of the `primary_narration` rows, which hold the whole work.
+    """
+    if 'tag' in annotation_df:
+        primary = annotation_df.tag == 'primary_narration'
+        for column in text_columns:
+            if column in annotation_df:
+                annotation_df.loc[primary, column] = ''
+    return annotation_df
+
+
+def parse_annotations(
+        path: str,
+        tags: Optional[List[str]] = None,
+        columns: Optional[List[str]] = None,
+        primary_text: bool = False,
+        contexts: bool = True) -> pd.DataFrame:
+    """Parses an annotation file and reduces it to the given tags and columns.
+
+    Args:
+        path (str): Path to the `*_embedded_narrations.json` file.
+        tags (List[str], optional): Only include annotations with these tags. Defaults to None (all tags).
+        columns (List[str], optional): Only include these columns. Defaults to None (all columns).
+        primary_text (bool, optional): Whether to keep the text columns of the `primary_narration` rows.
+            Defaults to False.
+        contexts (bool, optional): Whether to keep 'left_context' and 'right_context'. Defaults to True.
+
+    Returns:
+        pd.DataFrame: The annotations.
+    """
+    annotation_df = pd.read_json(path)
+    for column in ['document', 'tag']:
+        annotation_df[column] = annotation_df[column].astype('category')
+    if not contexts:
+        annotation_df = annotation_df.drop(columns=context_columns)
+    if tags is not None:
+        annotation_df = annotation_df[annotation_df.tag.isin(tags)].copy()
+    if not primary_text:
+        annotation_df = drop_primary_text(annotation_df)
+    if columns is not None:
+        annotation_df = annotation_df[columns]
+    return annotation_df
+
+
+def _parse_annotations_args(args: tuple) -> pd.DataFrame:
+    return parse_annotations(*args)
+
+
+class AnnotationStore:
+    def __init__(
+            self,
+            root: str = '.',
+            maxsize: int = 16,
+            primary_text: bool = False,
+            columnar_path: Optional[str] = None,
+            contexts: bool = True):
+        """Loads annotation files once and keeps them in a bounded LRU cache.
+
+        Cached documents are invalidated when the modification time or the size of the file changes.
+        If `columnar_path` is given, annotations are read from the Parquet corpus written by
+        `narrview.columnar.convert_corpus` instead, using column projection and predicate pushdown.
+
+        Args:
+            root (str, optional): The repository root containing the annotation folders. Defaults to '.'.
+            maxsize (int, optional): Maximal number of documents held in the cache. Defaults to 16.
+            primary_text (bool, optional): Whether to keep the text columns of the `primary_narration` rows,
+                which hold the whole work. Defaults to False.
+            columnar_path (str, optional): Path of a Parquet corpus. Defaults to None (read the JSON files).
+            contexts (bool, optional): Whether to keep 'left_context' and 'right_context'. Without them, contexts
+                can be rebuilt from the plain texts with `narrview.alignment.add_context`. Defaults to True.
+        """
+        self.root = root
+        self.maxsize = maxsize
+        self.primary_text = primary_text
+        self.columnar_path = columnar_path
+        self.contexts = contexts
+        self._cache = OrderedDict()
+        self._derived = {}
+        self._extents = {}
+        self._lock = threading.Lock()
+
+    def path(self, text: str) -> str:
+        return annotation_path(text=text, root=self.root)
+
+    def _parse(self, path: str) -> pd.DataFrame:
+        return parse_annotations(path=path, primary_text=self.primary_text, contexts=self.contexts)
+
+    def _read_columnar(
+            self,
+            text: str,
+            tags: Optional[Iterable[str]] = None,
+            columns: Optional[Iterable[str]] = None,
+            window: Optional[tuple] = None) -> pd.DataFrame:
+        from narrview.columnar import read_corpus
+
+        self.path(text)     # validates the title
+        if columns is None and not self.contexts:
+            columns = [column for column in self.columns([text]) if column not in context_columns]
+        read_columns = None
+        if columns is not None:
+            read_columns = list(columns)
+            if 'tag' not in read_columns:
+                read_columns.append('tag')
+        annotation_df = read_corpus(
+            path=self.columnar_path,
+            texts=[text],
+            tags=tags,
+            columns=read_columns,
+            window=window
+        )
+        if not self.primary_text:
+            annotation_df = drop_primary_text(annotation_df)
+        if columns is not None:
+            annotation_df = annotation_df[list(columns)]
+        return annotation_df
+
+    def columns(self, texts: Optional[List[str]] = None) -> List[str]:
+        """Returns the columns of the given texts in the Parquet corpus, in the order of their JSON files.
+        """
+        from narrview.columnar import corpus_columns
+
+        return corpus_columns(self.columnar_path, texts)
+
+    def document(self, text: str) -> pd.DataFrame:
+        """Returns the cached annotation DataFrame of a text. The DataFrame is shared and must not be modified.
+
+        The `prop:*` columns are not part of it: they are held as `PropColumn`s by `prop_columns` and only turned into
+        lists by `rows`, `load` and `load_corpus`.
+
+        Args:
+            text (str): The texts short title.
+
+        Returns:
+            pd.DataFrame: All annotations of the text, without the `prop:*` columns.
+        """
+        path = self.path(text) if self.columnar_path is None else self.columnar_path
+        signature = file_signature(path)
+        key = (path, text)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == signature:
+                self._cache.move_to_end(key)
+                return cached[1]
+
+        with span('parse', text=text):
+            if self.columnar_path is None:
+                annotation_df = self._parse(path)
+            else:
+                annotation_df = self._read_columnar(text)
+
+        return self._insert(key, signature, annotation_df)
+
+    def _insert(self, key: tuple, signature: tuple, annotation_df: pd.DataFrame) -> pd.DataFrame:
+        """Caches a parsed document with its `prop:*` columns encoded as `PropColumn`s instead of lists.
+        """
+        columns = list(annotation_df.columns)
+        prop_columns = encode_props(annotation_df)
+        annotation_df = annotation_df.drop(columns=list(prop_columns))
+        with self._lock:
+            self._cache[key] = (signature, annotation_df)
+            self._cache.move_to_end(key)
+            self._derived[key] = {
+                'columns': (annotation_df, columns),
+                'prop_columns': (annotation_df, prop_columns)
+            }
+            while len(self._cache) > self.maxsize:
+                evicted, _ = self._cache.popitem(last=False)
+                self._derived.pop(evicted, None)
+        return annotation_df
+
+    def is_cached(self, text: str) -> bool:
+        """Whether the current version of a document is cached.
+        """
+        path = self.path(text) if self.columnar_path is None else self.columnar_path
+        with self._lock:
+            cached = self._cache.get((path, text))
+        return cached is not None and cached[0] == file_signature(path)
+
+    def _derive(self, text: str, name: str, build: Callable[[pd.DataFrame], Any]) -> Any:
+        """Returns a structure derived from `document(text)`, cached as long as the document is cached.
+        """
+        annotation_df = self.document(text)
+        key = (self.path(text) if self.columnar_path is None else self.columnar_path, text)
+        with self._lock:
+            cached = self._derived.get(key, {}).get(name)
+            if cached is not None and cached[0] is annotation_df:
+                return cached[1]
+
+        derived = build(annotation_df)
+        with self._lock:
+            self._derived.setdefault(key, {})[name] = (annotation_df, derived)
+        return derived
+
+    def interval_index(self, text: str) -> IntervalIndex:
+        """Returns the cached interval index over the start and end points of all annotations of a text.
+        Its positions refer to the rows of `document(text)`.
+        """
+        return self._derive(text, 'interval_index', IntervalIndex.from_frame)
+
+    def prop_columns(self, text: str) -> Dict[str, PropColumn]:
+        """Returns the cached `PropColumn` encoding of all `prop:*` columns of a text.
+        Its rows refer to the rows of `document(text)`.
+        """
+        return self._derive(text, 'prop_columns', encode_props)
+
+    def document_columns(self, text: str) -> List[str]:
+        """Returns all columns of a text in the order of its annotation file, the `prop:*` columns included.
+        """
+        return self._derive(text, 'columns', lambda annotation_df: list(annotation_df.columns))
+
+    def rows(self, text: str, positions: np.ndarray, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Returns a copy of some rows of `document(text)` with the `prop:*` columns as lists.
+
+        Args:
+            text (str): The texts short title.
+            positions (np.ndarray): The rows, e.g. from `positions`.
+            columns (Iterable[str], optional): Only include these columns. Defaults to None (all columns).
+
+        Returns:
+            pd.DataFrame: The annotations.
+        """
+        annotation_df = self.document(text)
+        prop_columns = self.prop_columns(text)
+        columns = self.document_columns(text) if columns is None else list(columns)
+        rows_df = annotation_df.iloc[positions][[column for column in columns if column not in prop_columns]].copy()
+        for column in columns:
+            if column in prop_columns:
+                rows_df[column] = pd.Series(
+                    prop_columns[column].take(positions).to_lists(), index=rows_df.index, dtype=object)
+        return rows_df[columns]
+
+    @instrumented('filter', attributes=['text'])
+    def positions(
+            self,
+            text: str,
+            tags: Optional[Iterable[str]] = None,
+            start_point: float = 0,
+            end_point: float = 1.0,
+            mode: str = 'start',
+            props: Optional[Dict[str, Iterable[str]]] = None) -> np.ndarray:
+        """Returns the rows of `document(text)` matching the filters of `load`. `props` additionally keeps only
+        annotations having any of the given values per property, e.g. {'prop:speaker': ['adam']}.
+        """
+        check_mode(mode)
+        annotation_df = self.document(text)
+        if start_point > 0 or end_point < 1.0:
+            positions = self.interval_index(text).query(
+                *self.window(text=text, start_point=start_point, end_point=end_point), mode=mode)
+        else:
+            positions = np.arange(len(annotation_df))
+        if tags is not None:
+            positions = positions[annotation_df.tag.isin(list(tags)).to_numpy()[positions]]
+        for prop, values in (props or {}).items():
+            positions = positions[self.prop_columns(text)[prop].contains(values)[positions]]
+        return positions
+
+    def window(self, text: str, start_point: float = 0, end_point: float = 1.0) -> tuple:
+        """Converts a window given as fractions of the annotated text length into character offsets.
+        """
+        extent = self.extent(text)
+        return start_point * extent, end_point * extent
+
+    @instrumented('load', attributes=['text'])
+    def load(
+            self,
+            text: str,
+            tags: Optional[Iterable[str]] = None,
+            columns: Optional[Iterable[str]] = None,
+            start_point: float = 0,
+            end_point: float = 1.0,
+            mode: str = 'start') -> pd.DataFrame:
+        """Returns a copy of the annotations of a text, optionally reduced to some tags, columns and a text window.
+
+        Args:
+            text (str): The texts short title.
+            tags (Iterable[str], optional): Only include annotations with these tags. Defaults to None (all tags).
+            columns (Iterable[str], optional): Only include these columns. Defaults to None (all columns).
+            start_point (float, optional): Start of the window as fraction of the annotated text length. Defaults to 0.
+            end_point (float, optional): End of the window as fraction of the annotated text length. Defaults to 1.0.
+            mode (str, optional): 'start', 'contained' or 'overlap', see `IntervalIndex.query`. Defaults to 'start'.
+
+        Returns:
+            pd.DataFrame: The annotations.
+        """
+        check_mode(mode)
+        window = None
+        if start_point > 0 or end_point < 1.0:
+            window = self.window(text=text, start_point=start_point, end_point=end_point) + (mode,)
+
+        if self.columnar_path is not None and not self.is_cached(text):
+            return self._read_columnar(text=text, tags=tags, columns=columns, window=window)
+
+        return self.rows(
+            text=text,
+            positions=self.positions(text=text, tags=tags, start_point=start_point, end_point=end_point, mode=mode),
+            columns=columns
+        )
+
+    def select(
+            self,
+            annotation_df: pd.DataFrame,
+            text: str,
+            tags: Optional[Iterable[str]] = None,
+            start_point: float = 0,
+            end_point: float = 1.0,
+            mode: str = 'start') -> pd.DataFrame:
+        """Applies the filters of `load` to annotations of a text that were selected elsewhere, e.g. search results.
+
+        Args:
+            annotation_df (pd.DataFrame): Annotations of the text.
+            text (str): The texts short title, used for the annotated text length.
+            tags (Iterable[str], optional): Only include annotations with these tags. Defaults to None (all tags).
+            start_point (float, optional): Start of the window as fraction of the annotated text length. Defaults to 0.
+            end_point (float, optional): End of the window as fraction of the annotated text length. Defaults to 1.0.
+            mode (str, optional): 'start', 'contained' or 'overlap', see `IntervalIndex.query`. Defaults to 'start'.
+
+        Returns:
+            pd.DataFrame: The remaining annotations.
+        """
+        if 'document' in annotation_df:
+            annotation_df = annotation_df[annotation_df.document.astype(str) == text]
+        if tags is not None:
+            annotation_df = annotation_df[annotation_df.tag.isin(list(tags))]
+        if start_point > 0 or end_point < 1.0:
+            annotation_df = annotation_df[window_mask(
+                annotation_df, *self.window(text=text, start_point=start_point, end_point=end_point), mode=mode)]
+        return annotation_df.copy()
+
+    def extent(self, text: str) -> int:
+        """Returns the maximal end point of all annotations of a text, i.e. the annotated text length.
+        Cached as long as the document is cached, so that window queries do not re-read the Parquet corpus.
+        Texts whose document is not cached only read the 'end_point' column of the Parquet corpus, so that `load`
+        keeps its column projection and predicate pushdown.
+        """
+        if self.columnar_path is None or self.is_cached(text):
+            return self._derive(text, 'extent', lambda annotation_df: int(annotation_df.end_point.max()))
+
+        key = (self.columnar_path, text)
+        signature = file_signature(self.columnar_path)
+        with self._lock:
+            cached = self._extents.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        extent = int(self._read_columnar(text=text, columns=['end_point']).end_point.max())
+        with self._lock:
+            self._extents[key] = (signature, extent)
+        return extent
+
+    @instrumented('load_corpus')
+    def load_corpus(
+            self,
+            texts: Optional[List[str]] = None,
+            tags: Optional[Iterable[str]] = None,
+            columns: Optional[Iterable[str]] = None,
+            processes: Optional[int] = None) -> pd.DataFrame:
+        """Loads the annotations of several texts into a single DataFrame.
+
+        Texts that are not cached are parsed concurrently in a process pool and added to the cache. The documents
+        are filtered afterwards and concatenated once.
+
+        Args:
+            texts (List[str], optional): The texts short titles. Defaults to None (all plays and stories).
+            tags (Iterable[str], optional): Only include annotations with these tags. Defaults to None (all tags).
+            columns (Iterable[str], optional): Only include these columns. Defaults to None (all columns).
+            processes (int, optional): Number of worker processes. 1 parses in the calling process.
+                Defaults to None (one per CPU, at most one per text).
+
+        Returns:
+            pd.DataFrame: The annotations, with `document` as categorical column in the order of `texts`.
+        """
+        texts = list(texts) if texts is not None else corpora['All']
+        tags = list(tags) if tags is not None else None
+        columns = list(columns) if columns is not None else None
+        if columns is not None and 'document' not in columns:
+            columns = ['document'] + columns
+
+        if self.columnar_path is not None:
+            from narrview.columnar import read_corpus
+
+            for text in texts:
+                self.path(text)     # validates the titles
+            if columns is None and not self.contexts:
+                columns = [column for column in self.columns(texts) if column not in context_columns]
+            corpus_df = read_corpus(
+                path=self.columnar_path, texts=texts, tags=tags, columns=columns)
+            if not self.primary_text:
+                corpus_df = drop_primary_text(corpus_df)
+        else:
+            documents = {}
+            signatures = {}
+            with self._lock:
+                for text in texts:
+                    path = self.path(text)
+                    signatures[text] = file_signature(path)
+                    cached = self._cache.get((path, text))
+                    if cached is not None and cached[0] == signatures[text]:
+                        self._cache.move_to_end((path, text))
+                        documents[text] = cached[1]
+
+            # missing documents are parsed as a whole and cached, so that later calls skip the pool
+            missing = [text for text in texts if text not in documents]
+            jobs = [(self.path(text), None, None, self.primary_text, self.contexts) for text in missing]
+            processes = processes or min(len(jobs), os.cpu_count() or 1)
+            if processes > 1:
+                with ProcessPoolExecutor(max_workers=processes) as executor:
+                    parsed = list(executor.map(_parse_annotations_args, jobs))
+            else:
+                parsed = [_parse_annotations_args(job) for job in jobs]
+            for text, annotation_df in zip(missing, parsed):
+                documents[text] = self._insert((self.path(text), text), signatures[text], annotation_df)
+
+            parts = []
+            for text in texts:
+                positions = np.arange(len(documents[text]))
+                if tags is not None:
+                    positions = np.flatnonzero(documents[text].tag.isin(tags).to_numpy())
+                parts.append(self.rows(text=text, positions=positions, columns=columns))
+
+            corpus_df = pd.concat(parts, ignore_index=True)
+
+        corpus_df['document'] = pd.Categorical(
+            corpus_df['document'].astype(str), categories=texts)
+        return corpus_df
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._derived.clear()
+            self._extents.clear()
+
+
+default_store = AnnotationStore(columnar_path=os.environ.get('NARRVIEW_CORPUS'))
+
+
+def preload(texts: Optional[List[str]] = None) -> None:
+    """Parses the annotation files into the shared `default_store`, e.g. before forking worker processes or as
+    initializer of a process pool.
+
+    Args:
+        texts (List[str], optional): The texts short titles. Defaults to None (all plays and stories).
+    """
+    for text in texts or corpora['All']:
+        default_store.document(text)
+
+
+def load_annotations(
+        text: str,
+        tags: Optional[Iterable[str]] = None,
+        columns: Optional[Iterable[str]] = None,
+        start_point: float = 0,
+        end_point: float = 1.0,
+        mode: str = 'start') -> pd.DataFrame:
+    """Loads the annotations of a text through the shared `default_store`.
+    """
+    return default_store.load(
+        text=text, tags=tags, columns=columns,
+        start_point=start_point, end_point=end_point, mode=mode)
+
+
+def load_corpus(
+        texts: Optional[List[str]] = None,
+        tags: Optional[Iterable[str]] = None,
+        columns: Optional[Iterable[str]] = None,
+        processes: Optional[int] = None) -> pd.DataFrame:
+    """Loads the annotations of several texts through the shared `default_store`.
+    """
+    return default_store.load_corpus(
+        texts=texts, tags=tags, columns=columns, processes=processes)
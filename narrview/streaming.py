@@ -0,0 +1,268 @@
+"""Incremental reader for annotation files that are too large to be loaded as a whole.
+
+The top-level JSON array is decoded one annotation at a time from a buffered file, so that memory is bounded by the
+largest single annotation plus the kept rows. Tag, property and offset filters are applied while reading and
+unrequested fields are dropped right after each annotation is decoded.
+"""
+import json
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+import pandas as pd
+from narrview.intervals import check_mode
+from narrview.network import Edge, format_string_list, get_network_tags
+from narrview.store import annotation_path
+
+
+decoder = json.JSONDecoder()
+whitespace = ' \t\n\r'
+
+
+def iter_json_array(json_file: TextIO, chunk_size: int = 1 << 20) -> Iterator:
+    """Yields the elements of a top-level JSON array one by one.
+
+    Args:
+        json_file (TextIO): The file opened in text mode.
+        chunk_size (int, optional): Number of characters read at once. Grows for elements larger than the buffer.
+            Defaults to 1 MiB.
+    """
+    buffer = ''
+    position = 0
+    exhausted = False
+
+    def fill(size: int) -> bool:
+        nonlocal buffer, position, exhausted
+        chunk = json_file.read(size)
+        buffer = buffer[position:] + chunk
+        position = 0
+        exhausted = not chunk
+        return bool(chunk)
+
+    def skip(characters: str) -> None:
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in characters:
+                position += 1
+            if position < len(buffer) or not fill(chunk_size):
+                return
+
+    skip(whitespace)
+    if position >= len(buffer) or buffer[position] != '[':
+        raise ValueError('The annotation file is no JSON array!')
+    position += 1
+
+    read_size = chunk_size
+    while True:
+        skip(whitespace + ',')
+        if position >= len(buffer):
+            raise ValueError('The annotation file ends within the JSON array!')
+        if buffer[position] == ']':
+            return
+        try:
+            element, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # the element continues beyond the buffer
+            if exhausted or not fill(read_size):
+                raise
+            read_size *= 2
+            continue
+        if not exhausted and (end == len(buffer) or isinstance(element, (int, float)) and buffer[end] in '.eE'):
+            # a number may continue beyond the buffer, e.g. '1' of '12' or '0' of '0.25'
+            fill(read_size)
+            continue
+        read_size = chunk_size
+        position = end
+        yield element
+
+
+def in_window(start_point: int, end_point: int, abs_start_point: float, abs_end_point: float, mode: str) -> bool:
+    """Whether an annotation belongs to a window, see `narrview.intervals.IntervalIndex.query`.
+    """
+    if mode == 'overlap':
+        return start_point <= abs_end_point and end_point >= abs_start_point
+    if not abs_start_point <= start_point <= abs_end_point:
+        return False
+    return mode == 'start' or end_point <= abs_end_point
+
+
+def iter_annotations(
+        path: str,
+        tags: Optional[Iterable[str]] = None,
+        columns: Optional[Iterable[str]] = None,
+        window: Optional[tuple] = None,
+        props: Optional[Dict[str, Iterable[str]]] = None,
+        primary_text: bool = False) -> Iterator[dict]:
+    """Yields the annotations of a file matching the filters, reduced to the requested columns.
+
+    Args:
+        path (str): Path to the `*_embedded_narrations.json` file.
+        tags (Iterable[str], optional): Only yield annotations with these tags. Defaults to None (all tags).
+        columns (Iterable[str], optional): Only keep these fields. Defaults to None (all fields).
+        window (tuple, optional): (abs_start_point, abs_end_point, mode) as character offsets. Defaults to None.
+        props (Dict[str, Iterable[str]], optional): Only yield annotations having any of the given values per property,
+            e.g. {'prop:speaker': ['Kohlhaas']}. Defaults to None.
+        primary_text (bool, optional): Whether to keep the text fields of the `primary_narration`, which hold the whole
+            work. Defaults to False.
+    """
+    tags = set(tags) if tags is not None else None
+    columns = list(columns) if columns is not None else None
+    props = {prop: set(values) for prop, values in (props or {}).items()}
+    if window is not None:
+        check_mode(window[2])
+
+    with open(path, encoding='utf-8') as json_file:
+        for record in iter_json_array(json_file):
+            if tags is not None and record['tag'] not in tags:
+                continue
+            if window is not None and not in_window(record['start_point'], record['end_point'], *window):
+                continue
+            if any(values.isdisjoint(record[prop]) for prop, values in props.items()):
+                continue
+            if not primary_text and record['tag'] == 'primary_narration':
+                for field in ['left_context', 'annotation', 'right_context']:
+                    if field in record:
+                        record[field] = ''
+            if columns is not None:
+                record = {column: record[column] for column in columns}
+            yield record
+
+
+def _stream_window(
+        text: str,
+        tags: Optional[Iterable[str]],
+        columns: List[str],
+        start_point: float,
+        end_point: float,
+        mode: str,
+        props: Optional[Dict[str, Iterable[str]]],
+        root: str) -> List[dict]:
+    """Streams the filtered annotations of a text. The window is given as fractions of the maximal end point of all
+    annotations, which is only known at the end of the file, so it is applied to the kept annotations afterwards.
+    """
+    check_mode(mode)
+    windowed = start_point > 0 or end_point < 1.0
+    read_columns = columns
+    if windowed:
+        read_columns = list(dict.fromkeys(columns + ['start_point', 'end_point'] + list(props or {})))
+
+    path = annotation_path(text=text, root=root)
+    if not windowed:
+        records = list(iter_annotations(path=path, tags=tags, columns=read_columns, props=props))
+    else:
+        # the extent covers all annotations, so tags and properties are filtered here
+        extent = 0
+        records = []
+        for record in iter_annotations(path=path, columns=read_columns + ['tag']):
+            extent = max(extent, record['end_point'])
+            if tags is not None and record['tag'] not in tags:
+                continue
+            if any(set(values).isdisjoint(record[prop]) for prop, values in (props or {}).items()):
+                continue
+            records.append(record)
+        records = [
+            record for record in records
+            if in_window(record['start_point'], record['end_point'], start_point * extent, end_point * extent, mode)
+        ]
+    return [{column: record[column] for column in columns} for record in records]
+
+
+def stream_annotations(
+        text: str,
+        tags: Optional[Iterable[str]] = None,
+        columns: Optional[List[str]] = None,
+        start_point: float = 0,
+        end_point: float = 1.0,
+        mode: str = 'start',
+        props: Optional[Dict[str, Iterable[str]]] = None,
+        root: str = '.') -> pd.DataFrame:
+    """Same as `AnnotationStore.load`, built from a single pass over the file without loading it as a whole.
+    The result can be passed as `annotation_df` to `single_text_scatter` (with the default window).
+
+    Args:
+        text (str): The texts short title.
+        tags (Iterable[str], optional): Only include annotations with these tags. Defaults to None (all tags).
+        columns (List[str], optional): Only include these columns. Defaults to None (all columns but the contexts).
+        start_point (float, optional): Start of the window as fraction of the annotated text length. Defaults to 0.
+        end_point (float, optional): End of the window as fraction of the annotated text length. Defaults to 1.0.
+        mode (str, optional): 'start', 'contained' or 'overlap', see `IntervalIndex.query`. Defaults to 'start'.
+        props (Dict[str, Iterable[str]], optional): Only include annotations having any of the given values per
+            property. Defaults to None.
+        root (str, optional): The repository root. Defaults to '.'.
+
+    Returns:
+        pd.DataFrame: The annotations.
+    """
+    if columns is None:
+        columns = [
+            'document', 'tag', 'annotation', 'start_point', 'end_point',
+            'prop:speaker', 'prop:addressee', 'prop:relation_narrator-event_time',
+            'prop:speech_representation', 'prop:informativeness', 'prop:falsification_status'
+        ]
+    records = _stream_window(
+        text=text, tags=tags, columns=list(columns), start_point=start_point, end_point=end_point,
+        mode=mode, props=props, root=root)
+    return pd.DataFrame.from_records(records, columns=list(columns))
+
+
+def stream_edge_frame(
+        text: str = '1810-kohlhaas',
+        network_annotations: str = 'character_speech',
+        start_point: float = 0,
+        end_point: float = 1.0,
+        window_mode: str = 'start',
+        root: str = '.') -> pd.DataFrame:
+    """Same as `narrview.network.get_edge_frame`, aggregated from a single pass over the annotation file.
+    """
+    records = _stream_window(
+        text=text,
+        tags=get_network_tags(network_annotations),
+        columns=['annotation', 'start_point', 'prop:speaker', 'prop:addressee'],
+        start_point=start_point,
+        end_point=end_point,
+        mode=window_mode,
+        props=None,
+        root=root
+    )
+
+    # aggregate edge weights, texts and start points per pair in order of appearance,
+    # skipping the last annotation like `get_edge_frame`
+    edges = {}
+    for record in records[:-1]:
+        for speaker in record['prop:speaker']:
+            for addressee in record['prop:addressee']:
+                edge = edges.setdefault((speaker, addressee), ([], []))
+                edge[0].append(record['annotation'])
+                edge[1].append(record['start_point'])
+    return pd.DataFrame(
+        [
+            (speaker, addressee, len(texts), texts, start_points)
+            for (speaker, addressee), (texts, start_points) in edges.items()
+        ],
+        columns=['speaker', 'addressee', 'weight', 'text', 'start_point']
+    )
+
+
+def stream_edges(
+        text: str = '1810-kohlhaas',
+        network_annotations: str = 'character_speech',
+        start_point: float = 0,
+        end_point: float = 1.0,
+        window_mode: str = 'start',
+        root: str = '.') -> Iterator[Edge]:
+    """Same as `narrview.network.get_edges`, aggregated from a single pass over the annotation file.
+    The edges can be passed to `narrview.network.create_network_from_edges`.
+    """
+    edge_df = stream_edge_frame(
+        text=text,
+        network_annotations=network_annotations,
+        start_point=start_point,
+        end_point=end_point,
+        window_mode=window_mode,
+        root=root
+    )
+    for speaker, addressee, weight, texts in zip(
+            edge_df.speaker, edge_df.addressee, edge_df.weight, edge_df.text):
+        yield Edge(
+            speaker=speaker,
+            addressee=addressee,
+            text=format_string_list(texts),
+            weight=int(weight),
+        )
@@ -0,0 +1,314 @@
+"""Network stats and layouts for parameter sweeps, computed in parallel into one tidy table.
+
+Usage:
+    python -m narrview.sweep --output sweeps --windows 0-1 0-0.5 0.5-1 --layouts kamada_kawai spring
+
+Every combination of text, annotation type, window, layout and node size metric is one configuration. The
+configurations sharing a graph (text, annotation type and window) are computed together in a process pool, so
+that edges and stats are computed once per graph and layouts once per graph and layout. The annotations are
+loaded before the workers are forked, so all workers share the parsed corpus.
+
+Finished configurations are written to the output directory right away and recorded with their fingerprint in
+`manifest.json`, so that an interrupted sweep resumes where it stopped and unchanged configurations are skipped.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+from narrview.intervals import check_mode, check_window, modes, parse_window
+from narrview.layout import compute_layout, layout_function
+from narrview.manifest import read_manifest, write_manifest
+from narrview.metrics import backends, network_stats, stats_metrics
+from narrview.network import create_network_from_edges, get_edges, network_tags
+from narrview.store import annotation_path, default_store, file_signature, plays, preload, stories
+
+
+logger = logging.getLogger('narrview.sweep')
+
+config_columns = [
+    'text', 'network_annotations', 'start_point', 'end_point', 'window_mode', 'network_layout', 'node_size'
+]
+
+
+@dataclass
+class SweepConfig:
+    text: str
+    network_annotations: str
+    start_point: float
+    end_point: float
+    window_mode: str = 'start'
+    network_layout: str = 'kamada_kawai'
+    node_size: str = 'betweenness'
+
+    @property
+    def name(self) -> str:
+        return (
+            f'{self.text}_{self.network_annotations}_{self.start_point:g}-{self.end_point:g}_{self.window_mode}_'
+            f'{self.network_layout}_{self.node_size}'
+        )
+
+    @property
+    def graph(self) -> tuple:
+        """The parameters the network graph depends on.
+        """
+        return self.text, self.network_annotations, self.start_point, self.end_point, self.window_mode
+
+    def fingerprint(self, settings: dict, root: str = '.') -> str:
+        signature = file_signature(annotation_path(text=self.text, root=root))
+        fingerprint = json.dumps([asdict(self), settings, *signature], sort_keys=True)
+        return hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
+
+
+def sweep_grid(
+        texts: List[str],
+        annotation_types: List[str] = list(network_tags),
+        windows: List[Tuple[float, float]] = [(0, 1.0)],
+        window_modes: List[str] = ['start'],
+        layouts: List[str] = ['kamada_kawai'],
+        node_sizes: List[str] = ['betweenness']) -> List[SweepConfig]:
+    """Returns all combinations of the given parameters.
+
+    Args:
+        texts (List[str]): The texts short titles.
+        annotation_types (List[str], optional): 'character_speech' and/or 'embedded_narrations'. Defaults to both.
+        windows (List[Tuple[float, float]], optional): Text parts as (start_point, end_point) fractions.
+            Defaults to [(0, 1.0)].
+        window_modes (List[str], optional): 'start', 'contained' and/or 'overlap'. Defaults to ['start'].
+        layouts (List[str], optional): Names of networkx layouts, e.g. 'kamada_kawai' or 'spring'.
+            Defaults to ['kamada_kawai'].
+        node_sizes (List[str], optional): Metrics used as node size. Defaults to ['betweenness'].
+
+    Returns:
+        List[SweepConfig]: The configurations.
+    """
+    for network_annotations in annotation_types:
+        if network_annotations not in network_tags:
+            raise ValueError(
+                f'"{network_annotations}" is no valid annotation type! Choose one of {", ".join(network_tags)}.')
+    for start_point, end_point in windows:
+        check_window(start_point, end_point)
+    for window_mode in window_modes:
+        check_mode(window_mode)
+    for layout in layouts:
+        layout_function(layout)     # validates the layout
+    for node_size in node_sizes:
+        if node_size not in stats_metrics:
+            raise ValueError(f'"{node_size}" is no valid metric! Choose one of {", ".join(stats_metrics)}.')
+
+    return [
+        SweepConfig(
+            text=text,
+            network_annotations=network_annotations,
+            start_point=start_point,
+            end_point=end_point,
+            window_mode=window_mode,
+            network_layout=layout,
+            node_size=node_size
+        )
+        for text in texts
+        for network_annotations in annotation_types
+        for start_point, end_point in windows
+        for window_mode in window_modes
+        for layout in layouts
+        for node_size in node_sizes
+    ]
+
+
+def sweep_graph(
+        configs: List[SweepConfig],
+        settings: dict) -> List[Tuple[SweepConfig, Optional[pd.DataFrame], Optional[str]]]:
+    """Computes the stats of one network graph, its layouts and the node sizes of all configurations sharing it.
+
+    Returns:
+        List[Tuple[SweepConfig, pd.DataFrame, str]]: Per configuration the result with one row per character and
+            None, or None and the error message.
+    """
+    text, network_annotations, start_point, end_point, window_mode = configs[0].graph
+    try:
+        network_graph = create_network_from_edges(list(get_edges(
+            text=text,
+            network_annotations=network_annotations,
+            start_point=start_point,
+            end_point=end_point,
+            window_mode=window_mode
+        )))
+        metrics = list(dict.fromkeys((settings['metrics'] or stats_metrics) + [config.node_size for config in configs]))
+        stats_df = network_stats(
+            network_graph, metrics=metrics, backend=settings['backend'], betweenness_k=settings['betweenness_k'])
+        stats_df = stats_df.rename_axis('character').reset_index()
+    except Exception as error:
+        return [(config, None, f'{type(error).__name__}: {error}') for config in configs]
+
+    positions = {}
+    results = []
+    for config in configs:
+        try:
+            if config.network_layout not in positions:
+                positions[config.network_layout] = compute_layout(
+                    network_graph, network_layout=layout_function(config.network_layout))
+            pos = positions[config.network_layout]
+            node_sizes = stats_df[config.node_size]
+            result_df = stats_df.assign(
+                x=[float(pos[character][0]) for character in stats_df.character],
+                y=[float(pos[character][1]) for character in stats_df.character],
+                # like the node sizes of `Network.figure`
+                marker_size=(node_sizes / node_sizes.sum()).fillna(0) * settings['node_factor']
+                + settings['node_alpha'],
+                **{column: getattr(config, column) for column in config_columns}
+            )
+        except Exception as error:
+            results.append((config, None, f'{type(error).__name__}: {error}'))
+            continue
+        results.append((config, result_df, None))
+    return results
+
+
+def prepare_worker(root: str, texts: List[str]) -> None:
+    """Points the shared store of a worker process to the repository root of the sweep and loads the texts.
+    """
+    default_store.root = root
+    preload(texts)
+
+
+def result_path(output_dir: str, config: SweepConfig) -> str:
+    return os.path.join(output_dir, 'results', f'{config.name}.pkl')
+
+
+def sweep(
+        configs: List[SweepConfig],
+        output_dir: str = 'sweeps',
+        metrics: Optional[List[str]] = None,
+        backend: str = 'networkx',
+        betweenness_k: Optional[int] = None,
+        node_factor: float = 100.0,
+        node_alpha: int = 3,
+        processes: Optional[int] = None,
+        force: bool = False,
+        root: str = '.') -> pd.DataFrame:
+    """Computes network stats, node positions and node sizes for all configurations in a process pool.
+
+    Args:
+        configs (List[SweepConfig]): The configurations, e.g. from `sweep_grid`.
+        output_dir (str, optional): Directory for the results of finished configurations. Defaults to 'sweeps'.
+        metrics (List[str], optional): The metrics to include. Defaults to None (all metrics).
+        backend (str, optional): 'networkx' or 'scipy', see `narrview.metrics.compute_metric`. Defaults to 'networkx'.
+        betweenness_k (int, optional): Number of pivot nodes to sample for betweenness. Defaults to None (exact).
+        node_factor (float, optional): Node size factor like in `Network.figure`. Defaults to 100.0.
+        node_alpha (int, optional): Minimal node size like in `Network.figure`. Defaults to 3.
+        processes (int, optional): Number of worker processes. Defaults to None (one per CPU).
+        force (bool, optional): Whether to recompute finished configurations as well. Defaults to False.
+        root (str, optional): The repository root containing the annotation folders. Defaults to '.'.
+
+    Returns:
+        pd.DataFrame: One row per configuration and character with the configuration, the metrics, the node position
+            ('x', 'y') and the 'marker_size'. Failed configurations are logged and left out.
+    """
+    if backend not in backends:
+        raise ValueError(f'"{backend}" is no valid backend! Choose one of {", ".join(backends)}.')
+    for metric in metrics or []:
+        if metric not in stats_metrics:
+            raise ValueError(f'"{metric}" is no valid metric! Choose one of {", ".join(stats_metrics)}.')
+    settings = {
+        'metrics': metrics,
+        'backend': backend,
+        'betweenness_k': betweenness_k,
+        'node_factor': node_factor,
+        'node_alpha': node_alpha
+    }
+
+    os.makedirs(os.path.join(output_dir, 'results'), exist_ok=True)
+    manifest_path = os.path.join(output_dir, 'manifest.json')
+    manifest = read_manifest(manifest_path)
+
+    fingerprints = {config.name: config.fingerprint(settings, root) for config in configs}
+    graphs: Dict[tuple, List[SweepConfig]] = {}
+    for config in configs:
+        finished = manifest.get(config.name) == fingerprints[config.name] \
+            and os.path.exists(result_path(output_dir, config))
+        if force or not finished:
+            graphs.setdefault(config.graph, []).append(config)
+    logger.info(
+        'Sweeping %d of %d configurations in %d graphs.',
+        sum(map(len, graphs.values())), len(configs), len(graphs))
+
+    if graphs:
+        # forked workers share the annotations loaded here, other start methods load them once per worker
+        texts = list(dict.fromkeys(text for text, *_ in graphs))
+        if 'fork' in multiprocessing.get_all_start_methods():
+            if os.path.abspath(root) == os.path.abspath(default_store.root):
+                preload(texts)
+            executor = ProcessPoolExecutor(
+                max_workers=processes, mp_context=multiprocessing.get_context('fork'),
+                initializer=prepare_worker, initargs=(root, texts))
+        else:
+            executor = ProcessPoolExecutor(
+                max_workers=processes, initializer=prepare_worker, initargs=(root, texts))
+        with executor:
+            futures = [executor.submit(sweep_graph, graph_configs, settings) for graph_configs in graphs.values()]
+            for done, future in enumerate(as_completed(futures), start=1):
+                for config, result_df, error in future.result():
+                    if error is not None:
+                        logger.warning('%s failed: %s', config.name, error)
+                        manifest.pop(config.name, None)
+                        continue
+                    with open(result_path(output_dir, config), 'wb') as result_file:
+                        pickle.dump(result_df, result_file, protocol=pickle.HIGHEST_PROTOCOL)
+                    manifest[config.name] = fingerprints[config.name]
+                write_manifest(manifest, manifest_path)
+                logger.info('%d/%d graphs done.', done, len(futures))
+
+    results = []
+    for config in configs:
+        if manifest.get(config.name) == fingerprints[config.name]:
+            with open(result_path(output_dir, config), 'rb') as result_file:
+                results.append(pickle.load(result_file))
+    if not results:
+        return pd.DataFrame(columns=config_columns + ['character'])
+    sweep_df = pd.concat(results, ignore_index=True)
+    return sweep_df[config_columns + [column for column in sweep_df.columns if column not in config_columns]]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compute network stats and layouts for a parameter sweep.')
+    parser.add_argument('--output', default='sweeps', help='output directory')
+    parser.add_argument('--texts', nargs='+', default=plays + stories, help='short titles of the texts')
+    parser.add_argument(
+        '--annotations', nargs='+', default=list(network_tags), choices=list(network_tags),
+        help='annotation types')
+    parser.add_argument(
+        '--windows', nargs='+', default=['0-1'], help='text parts as start-end fractions, e.g. 0-0.33')
+    parser.add_argument('--window-modes', nargs='+', default=['start'], choices=modes, help='window modes')
+    parser.add_argument('--layouts', nargs='+', default=['kamada_kawai'], help='networkx layout names')
+    parser.add_argument(
+        '--node-sizes', nargs='+', default=['betweenness'], choices=stats_metrics, help='metrics used as node size')
+    parser.add_argument('--backend', default='networkx', choices=backends)
+    parser.add_argument('--betweenness-k', type=int, default=None, help='pivot nodes sampled for betweenness')
+    parser.add_argument('--processes', type=int, default=None, help='number of worker processes')
+    parser.add_argument('--force', action='store_true', help='recompute finished configurations as well')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    sweep_df = sweep(
+        configs=sweep_grid(
+            texts=args.texts,
+            annotation_types=args.annotations,
+            windows=[parse_window(window) for window in args.windows],
+            window_modes=args.window_modes,
+            layouts=args.layouts,
+            node_sizes=args.node_sizes
+        ),
+        output_dir=args.output,
+        backend=args.backend,
+        betweenness_k=args.betweenness_k,
+        processes=args.processes,
+        force=args.force
+    )
+    sweep_df.to_csv(os.path.join(args.output, 'sweep.csv'), index=False)
+    print(f'{len(sweep_df)} rows in {os.path.join(args.output, "sweep.csv")}')
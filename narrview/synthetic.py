@@ -0,0 +1,243 @@
+"""Synthetic corpora with the schema of the `*_embedded_narrations.json` files, for scale testing.
+
+Usage:
+    python -m narrview.synthetic --output synthetic --documents 100 --cast 40
+
+Every document consists of an annotation file and a plain text of pseudo-words, so that annotation strings
+and contexts are aligned with the character offsets like in the bundled corpus. The generated texts are named
+`synthetic-0000`, `synthetic-0001`, ... and have to be registered before loading:
+
+    from narrview.synthetic import register_synthetic
+    texts = register_synthetic('synthetic')
+    store = AnnotationStore(root='synthetic')
+"""
+import argparse
+import glob
+import json
+import os
+from typing import List
+import numpy as np
+from narrview.store import annotation_path, register_texts, text_path
+
+
+# relative frequencies of the tags in the bundled corpus
+tag_weights = {
+    'direct_speech': 0.55,
+    'indirect_speech': 0.15,
+    'narrated_character_speech': 0.1,
+    'secondary_narration': 0.15,
+    'tertiary_narration': 0.05
+}
+narration_tags = ['secondary_narration', 'tertiary_narration']
+# values of the properties annotated for embedded narrations, speech annotations have ['nan']
+narration_props = {
+    'prop:ontological_boundary': ['not_crossed', 'virtually_crossed', 'actually_crossed'],
+    'prop:world': ['diegetic_reality', 'dream'],
+    'prop:illocutionary_boundary': ['actually_crossed', 'virtually_crossed', 'not_crossed'],
+    'prop:informativeness': ['completive', 'repetitive', 'completive-repetitive'],
+    'prop:relation_narrator-event_time': [
+        'completed_retrospective_narration', 'simultaneous_narration', 'intercalated_narration', 'anterior_narration'
+    ],
+    'prop:falsification_status': ['not_falsified', 'falsified', 'partially_falsified'],
+    'prop:speech_representation': ['direct_speech', 'indirect_speech', 'narrated_character_speech'],
+    'prop:speech_modality': ['oral', 'written']
+}
+syllables = ['ka', 'ro', 'ne', 'mi', 'sa', 'te', 'lu', 'ber', 'sch', 'an', 'ge', 'dor', 'ein', 'un', 'hal', 'ris']
+context_width = 50
+date = 1591607587000
+
+
+def synthetic_name(i: int) -> str:
+    return f'synthetic-{i:04d}'
+
+
+def cast_names(cast_size: int) -> List[str]:
+    return [f'Character_{i:03d}' for i in range(cast_size)]
+
+
+def generate_text(length: int, rng: np.random.Generator) -> str:
+    """Generates a plain text of pseudo-words and sentences with exactly `length` characters.
+    """
+    vocabulary = [
+        ''.join(rng.choice(syllables, size=rng.integers(1, 4)))
+        for _ in range(2000)
+    ]
+    words = []
+    size = 0
+    while size < length:
+        word = vocabulary[rng.integers(len(vocabulary))] + ('. ' if rng.random() < 0.1 else ' ')
+        words.append(word)
+        size += len(word)
+    return ''.join(words)[:length]
+
+
+def sample_characters(
+        cast: List[str],
+        popularity: np.ndarray,
+        mean_count: float,
+        rng: np.random.Generator,
+        exclude: List[str] = []) -> List[str]:
+    """Samples at least one distinct character, on average `mean_count`, weighted by popularity.
+    Returns no characters if all of them are excluded, e.g. addressees in a cast of one.
+    """
+    available = [i for i, name in enumerate(cast) if name not in exclude]
+    if not available:
+        return []
+    count = min(1 + rng.poisson(max(mean_count - 1, 0)), len(available))
+    weights = popularity[available] / popularity[available].sum()
+    return [cast[i] for i in rng.choice(available, size=count, replace=False, p=weights)]
+
+
+def generate_annotations(
+        text: str,
+        plain_text: str,
+        annotation_density: float = 3.0,
+        cast_size: int = 20,
+        speaker_fanout: float = 1.0,
+        addressee_fanout: float = 1.1,
+        mean_length: int = 120,
+        seed: int = 0) -> List[dict]:
+    """Generates the annotations of a single document.
+
+    Args:
+        text (str): The documents short title.
+        plain_text (str): The documents plain text, which the annotation strings and contexts are taken from.
+        annotation_density (float, optional): Annotations per 1000 characters. Defaults to 3.0 (like the bundled novellas).
+        cast_size (int, optional): Number of characters. Defaults to 20.
+        speaker_fanout (float, optional): Mean number of speakers per annotation, at least 1. Defaults to 1.0.
+        addressee_fanout (float, optional): Mean number of addressees per annotation, at least 1. Defaults to 1.1.
+        mean_length (int, optional): Mean annotation length in characters. Defaults to 120.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        List[dict]: The annotation records, starting with the `primary_narration` and sorted by 'start_point'.
+    """
+    rng = np.random.default_rng(seed)
+    length = len(plain_text)
+    cast = cast_names(cast_size)
+    # a few protagonists speak most of the time
+    popularity = 1 / np.arange(1, cast_size + 1)
+    empty_props = {prop: ['nan'] for prop in narration_props}
+
+    def record(tag: str, start_point: int, end_point: int, speakers: list, addressees: list, props: dict) -> dict:
+        return {
+            'document': text,
+            'tag': tag,
+            'left_context': plain_text[max(start_point - context_width, 0):start_point],
+            'annotation': plain_text[start_point:end_point],
+            'right_context': plain_text[end_point:end_point + context_width],
+            'start_point': start_point,
+            'end_point': end_point,
+            'date': date,
+            'prop:speaker': speakers,
+            'prop:addressee': addressees,
+            **props
+        }
+
+    records = [
+        record('primary_narration', 0, length, [], [], dict(empty_props, **{'prop:world': ['diegetic_reality']}))
+    ]
+    count = int(length * annotation_density / 1000)
+    start_points = np.sort(rng.integers(0, length, size=count))
+    end_points = np.minimum(start_points + 1 + rng.exponential(mean_length, size=count).astype(int), length)
+    tags = rng.choice(list(tag_weights), size=count, p=np.array(list(tag_weights.values())))
+    for tag, start_point, end_point in zip(tags, start_points, end_points):
+        speakers = sample_characters(cast, popularity, speaker_fanout, rng)
+        addressees = sample_characters(cast, popularity, addressee_fanout, rng, exclude=speakers)
+        if tag in narration_tags:
+            props = {prop: [values[rng.integers(len(values))]] for prop, values in narration_props.items()}
+        else:
+            props = empty_props
+        records.append(record(str(tag), int(start_point), int(end_point), speakers, addressees, props))
+    return records
+
+
+def generate_corpus(
+        root: str,
+        documents: int = 10,
+        length: int = 200000,
+        annotation_density: float = 3.0,
+        cast_size: int = 20,
+        speaker_fanout: float = 1.0,
+        addressee_fanout: float = 1.1,
+        corpus: str = 'Novellas',
+        seed: int = 0) -> List[str]:
+    """Writes a synthetic corpus below `root` in the layout of the repository and registers its texts.
+
+    Args:
+        root (str): The output root, containing `Annotations{corpus}/` and `Texts/{corpus}/` afterwards.
+        documents (int, optional): Number of documents. Defaults to 10.
+        length (int, optional): Characters per document. Defaults to 200000 (about the length of a novella).
+        annotation_density (float, optional): Annotations per 1000 characters. Defaults to 3.0.
+        cast_size (int, optional): Number of characters per document. Defaults to 20.
+        speaker_fanout (float, optional): Mean number of speakers per annotation. Defaults to 1.0.
+        addressee_fanout (float, optional): Mean number of addressees per annotation. Defaults to 1.1.
+        corpus (str, optional): 'Dramas' or 'Novellas'. Defaults to 'Novellas'.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        List[str]: The short titles of the generated texts.
+    """
+    texts = [synthetic_name(i) for i in range(documents)]
+    register_texts(texts, corpus=corpus)
+    for i, text in enumerate(texts):
+        plain_text = generate_text(length, np.random.default_rng([seed, i, 0]))
+        records = generate_annotations(
+            text=text,
+            plain_text=plain_text,
+            annotation_density=annotation_density,
+            cast_size=cast_size,
+            speaker_fanout=speaker_fanout,
+            addressee_fanout=addressee_fanout,
+            seed=[seed, i, 1]
+        )
+        for path in [annotation_path(text=text, root=root), text_path(text=text, root=root)]:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(text_path(text=text, root=root), 'w', encoding='utf-8') as text_file:
+            text_file.write(plain_text)
+        with open(annotation_path(text=text, root=root), 'w', encoding='utf-8') as json_file:
+            json.dump(records, json_file, ensure_ascii=False)
+    return texts
+
+
+def register_synthetic(root: str) -> List[str]:
+    """Registers the synthetic texts found below `root`, e.g. in a new session.
+
+    Returns:
+        List[str]: The short titles of the texts.
+    """
+    texts = []
+    for corpus in ['Dramas', 'Novellas']:
+        paths = sorted(glob.glob(os.path.join(root, f'Annotations{corpus}', 'synthetic-*_embedded_narrations.json')))
+        corpus_texts = [os.path.basename(path)[:-len('_embedded_narrations.json')] for path in paths]
+        register_texts(corpus_texts, corpus=corpus)
+        texts += corpus_texts
+    return texts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a synthetic annotation corpus.')
+    parser.add_argument('--output', default='synthetic', help='output root directory')
+    parser.add_argument('--documents', type=int, default=10, help='number of documents')
+    parser.add_argument('--length', type=int, default=200000, help='characters per document')
+    parser.add_argument('--density', type=float, default=3.0, help='annotations per 1000 characters')
+    parser.add_argument('--cast', type=int, default=20, help='characters per document')
+    parser.add_argument('--speaker-fanout', type=float, default=1.0, help='mean speakers per annotation')
+    parser.add_argument('--addressee-fanout', type=float, default=1.1, help='mean addressees per annotation')
+    parser.add_argument('--corpus', default='Novellas', choices=['Dramas', 'Novellas'])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    if args.cast < 1:
+        parser.error('--cast has to be at least 1')
+    texts = generate_corpus(
+        root=args.output,
+        documents=args.documents,
+        length=args.length,
+        annotation_density=args.density,
+        cast_size=args.cast,
+        speaker_fanout=args.speaker_fanout,
+        addressee_fanout=args.addressee_fanout,
+        corpus=args.corpus,
+        seed=args.seed
+    )
+    print(f'{len(texts)} documents in {args.output}')
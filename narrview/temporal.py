@@ -0,0 +1,140 @@
+from typing import Callable, Iterator, List, Tuple
+import numpy as np
+import pandas as pd
+import networkx as nx
+from narrview.layout import compute_layout, default_layout_cache
+from narrview.metrics import network_stats
+from narrview.network import edge_pairs, get_network_tags, network_positions
+from narrview.store import default_store
+
+
+class TemporalNetwork:
+    def __init__(
+            self,
+            text: str = '1810-kohlhaas',
+            network_annotations: str = 'character_speech',
+            window_size: float = 0.2,
+            step: float = 0.05,
+            window_mode: str = 'start'):
+        """Sweeps a window across a text and updates a single network graph incrementally:
+        edge weights are added for annotations entering the window and subtracted for annotations leaving it.
+        Every window's graph has the edges of `Network` for the same text part.
+
+        Args:
+            text (str, optional): The texts short title. Defaults to '1810-kohlhaas'.
+            network_annotations (str, optional): 'character_speech' or 'embedded_narrations'. Defaults to 'character_speech'.
+            window_size (float, optional): Window size as fraction of the annotated text length. Defaults to 0.2.
+            step (float, optional): Step between two windows as fraction of the annotated text length. Defaults to 0.05.
+            window_mode (str, optional): Which annotations belong to a window: 'start', 'contained' or 'overlap',
+                see `narrview.intervals.IntervalIndex.query`. Defaults to 'start'.
+        """
+        if not 0 < window_size <= 1 or step <= 0:
+            raise ValueError('window_size has to be in (0, 1] and step has to be positive.')
+        self.text = text
+        self.network_annotations = network_annotations
+        self.window_size = window_size
+        self.step = step
+        self.window_mode = window_mode
+
+        # speaker-addressee pairs of all annotations of the type, the windows select them by annotation row
+        prop_columns = default_store.prop_columns(text)
+        self.rows, speaker_codes, addressee_codes = edge_pairs(
+            text=text,
+            positions=default_store.positions(text=text, tags=get_network_tags(network_annotations))
+        )
+        self.speakers = prop_columns['prop:speaker'].vocabulary[speaker_codes]
+        self.addressees = prop_columns['prop:addressee'].vocabulary[addressee_codes]
+
+    def windows(self) -> List[Tuple[float, float]]:
+        """Returns all windows as (start_point, end_point) fractions of the annotated text length.
+        """
+        count = int(np.floor(round((1 - self.window_size) / self.step, 9))) + 1
+        return [
+            (round(i * self.step, 9), round(i * self.step + self.window_size, 9))
+            for i in range(count)
+        ]
+
+    def _update(self, graph: nx.DiGraph, positions: np.ndarray, sign: int) -> None:
+        # `self.rows` is sorted, so the pairs of each entering or leaving row are found by binary search
+        starts = np.searchsorted(self.rows, positions, side='left')
+        lengths = np.searchsorted(self.rows, positions, side='right') - starts
+        pairs = np.repeat(starts, lengths) + np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        for speaker, addressee in zip(self.speakers[pairs], self.addressees[pairs]):
+            if sign > 0:
+                if graph.has_edge(speaker, addressee):
+                    graph[speaker][addressee]['weight'] += 1
+                else:
+                    graph.add_edge(speaker, addressee, weight=1)
+            else:
+                graph[speaker][addressee]['weight'] -= 1
+                if graph[speaker][addressee]['weight'] == 0:
+                    graph.remove_edge(speaker, addressee)
+                    for node in (speaker, addressee):
+                        if node in graph and graph.degree(node) == 0:
+                            graph.remove_node(node)
+
+    def graphs(self, copy: bool = True) -> Iterator[Tuple[float, float, nx.DiGraph]]:
+        """Yields the network graph of each window.
+
+        Args:
+            copy (bool, optional): Whether to yield a copy of the graph. If False, the same graph object is updated
+                in place and only valid until the next window is requested. Defaults to True.
+
+        Yields:
+            Tuple[float, float, nx.DiGraph]: start_point, end_point and graph of the window.
+        """
+        graph = nx.DiGraph()
+        current = np.array([], dtype=np.int64)
+        for start_point, end_point in self.windows():
+            # the same annotations as `Network` for the window
+            positions = network_positions(
+                text=self.text,
+                network_annotations=self.network_annotations,
+                start_point=start_point,
+                end_point=end_point,
+                window_mode=self.window_mode
+            )
+            self._update(graph, np.setdiff1d(current, positions, assume_unique=True), sign=-1)
+            self._update(graph, np.setdiff1d(positions, current, assume_unique=True), sign=1)
+            current = positions
+            yield start_point, end_point, graph.copy() if copy else graph
+
+    def layouts(
+            self,
+            network_layout: Callable = nx.drawing.layout.kamada_kawai_layout
+    ) -> Iterator[Tuple[float, float, nx.DiGraph, dict]]:
+        """Yields the graph and node positions of each window. Each layout is warm-started from the positions of the
+        previous window, which keeps nodes from jumping between frames.
+
+        Args:
+            network_layout (Callable, optional): A networkx layout function. Defaults to nx.drawing.layout.kamada_kawai_layout.
+
+        Yields:
+            Tuple[float, float, nx.DiGraph, dict]: start_point, end_point, graph and positions of the window.
+        """
+        pos = {}
+        for start_point, end_point, graph in self.graphs(copy=True):
+            pos = compute_layout(
+                graph,
+                network_layout=network_layout,
+                cache=default_layout_cache,
+                initial_pos=pos
+            )
+            yield start_point, end_point, graph, pos
+
+    def stats(self) -> Iterator[pd.DataFrame]:
+        """Yields the network stats of each window with the window's 'start_point' and 'end_point' as columns.
+        """
+        for start_point, end_point, graph in self.graphs(copy=False):
+            stats_df = network_stats(graph)
+            stats_df['start_point'] = start_point
+            stats_df['end_point'] = end_point
+            yield stats_df
+
+    def stats_frame(self) -> pd.DataFrame:
+        """Returns the network stats of all windows as one DataFrame indexed by window and character.
+        """
+        stats_df = pd.concat(list(self.stats()))
+        return stats_df.rename_axis('character').set_index(
+            ['start_point', 'end_point'], append=True
+        ).reorder_levels(['start_point', 'end_point', 'character'])
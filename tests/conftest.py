@@ -0,0 +1,12 @@
+import os
+import pytest
+
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def repository_root(monkeypatch):
+    """The shared store reads the annotation files relative to the repository root.
+    """
+    monkeypatch.chdir(root)
@@ -0,0 +1,167 @@
+"""The vectorized implementations against the straightforward row-wise versions they replaced."""
+import numpy as np
+import pandas as pd
+import pytest
+from narrview.intervals import IntervalIndex, modes, window_mask
+from narrview.network import get_edge_frame, get_network_tags, network_tags
+from narrview.props import PropColumn, cartesian, encode_props
+from narrview.scatter import explode_props, format_annotation_text, format_annotation_texts
+from narrview.store import AnnotationStore, annotation_path, corpora, parse_annotations
+
+
+windows = [(0, 1.0), (0.33, 0.66), (0.2, 0.6)]
+
+
+def scan_window(annotation_df: pd.DataFrame, abs_start_point: float, abs_end_point: float, mode: str) -> pd.Series:
+    start_points, end_points = annotation_df.start_point, annotation_df.end_point
+    if mode == 'start':
+        return (start_points >= abs_start_point) & (start_points <= abs_end_point)
+    if mode == 'contained':
+        return (start_points >= abs_start_point) & (end_points <= abs_end_point)
+    return (start_points <= abs_end_point) & (end_points >= abs_start_point)
+
+
+def loop_edges(text: str, network_annotations: str, start_point: float, end_point: float, mode: str) -> dict:
+    """Edges aggregated row by row from the annotation file, like `get_edges` before it was vectorized.
+    """
+    speech_data = pd.read_json(annotation_path(text))
+    max_end_point = max(speech_data.end_point)
+    speech_data = speech_data[scan_window(speech_data, start_point * max_end_point, end_point * max_end_point, mode)]
+    speech_data = speech_data[speech_data.tag.isin(get_network_tags(network_annotations))]
+
+    edge_dict = {}
+    for _, row in speech_data[:-1].iterrows():
+        for speaker in row['prop:speaker']:
+            for addressee in row['prop:addressee']:
+                edge = edge_dict.setdefault((speaker, addressee), {'weight': 0, 'text': [], 'start_point': []})
+                edge['weight'] += 1
+                edge['text'].append(row['annotation'])
+                edge['start_point'].append(row['start_point'])
+    return edge_dict
+
+
+@pytest.mark.parametrize('network_annotations', list(network_tags))
+@pytest.mark.parametrize('text', corpora['All'])
+def test_edge_frame(text, network_annotations):
+    for start_point, end_point in windows:
+        for mode in modes:
+            edge_df = get_edge_frame(
+                text=text,
+                network_annotations=network_annotations,
+                start_point=start_point,
+                end_point=end_point,
+                window_mode=mode
+            )
+            edges = {
+                (speaker, addressee): {'weight': weight, 'text': list(texts), 'start_point': list(start_points)}
+                for speaker, addressee, weight, texts, start_points in zip(
+                    edge_df.speaker, edge_df.addressee, edge_df.weight, edge_df.text, edge_df.start_point)
+            }
+            expected = loop_edges(text, network_annotations, start_point, end_point, mode)
+            # same edges in the same order of first appearance
+            assert list(edges.items()) == list(expected.items()), (text, network_annotations, start_point, mode)
+
+
+def test_interval_index_random():
+    rng = np.random.default_rng(0)
+    for _ in range(500):
+        count = rng.integers(0, 60)
+        start_points = rng.integers(0, 100, count)
+        annotation_df = pd.DataFrame(
+            {'start_point': start_points, 'end_point': start_points + rng.integers(0, 40, count)})
+        abs_start_point, abs_end_point = np.sort(rng.uniform(-10, 150, 2))
+        index = IntervalIndex.from_frame(annotation_df)
+        for mode in modes:
+            expected = np.flatnonzero(scan_window(annotation_df, abs_start_point, abs_end_point, mode))
+            np.testing.assert_array_equal(index.query(abs_start_point, abs_end_point, mode=mode), expected)
+            np.testing.assert_array_equal(
+                np.flatnonzero(window_mask(annotation_df, abs_start_point, abs_end_point, mode=mode)), expected)
+
+
+@pytest.mark.parametrize('text', corpora['All'])
+def test_interval_index_documents(text):
+    annotation_df = parse_annotations(annotation_path(text))
+    index = IntervalIndex.from_frame(annotation_df)
+    extent = annotation_df.end_point.max()
+    for start_point, end_point in windows + [(0.5, 0.5), (0.9, 1.0)]:
+        for mode in modes:
+            np.testing.assert_array_equal(
+                index.query(start_point * extent, end_point * extent, mode=mode),
+                np.flatnonzero(scan_window(annotation_df, start_point * extent, end_point * extent, mode))
+            )
+
+
+@pytest.mark.parametrize('text', corpora['All'])
+def test_prop_columns(text):
+    annotation_df = parse_annotations(annotation_path(text))
+    prop_columns = encode_props(annotation_df)
+    rng = np.random.default_rng(1)
+    rows = np.sort(rng.choice(len(annotation_df), size=min(200, len(annotation_df)), replace=False))
+    for prop, prop_column in prop_columns.items():
+        assert prop_column.to_lists() == list(annotation_df[prop])
+        assert prop_column.take(rows).to_lists() == list(annotation_df[prop].iloc[rows])
+        values = list(prop_column.vocabulary[:2]) + ['no value']
+        np.testing.assert_array_equal(
+            prop_column.contains(values),
+            [any(value in row_values for value in values) for row_values in annotation_df[prop]]
+        )
+
+    props = ['prop:speaker', 'prop:addressee']
+    row_ids, (speaker_codes, addressee_codes) = cartesian([prop_columns[prop] for prop in props], rows)
+    exploded_df = explode_props(df=annotation_df.iloc[rows], props=props)
+    np.testing.assert_array_equal(annotation_df.index[row_ids], exploded_df.index)
+    np.testing.assert_array_equal(prop_columns['prop:speaker'].vocabulary[speaker_codes], exploded_df['prop:speaker'])
+    np.testing.assert_array_equal(
+        prop_columns['prop:addressee'].vocabulary[addressee_codes], exploded_df['prop:addressee'])
+
+
+def test_prop_column_empty_rows():
+    values = [[], ['a'], [], ['b', 'a'], []]
+    prop_column = PropColumn.from_lists(values)
+    assert prop_column.to_lists() == values
+    assert prop_column.take(np.array([0, 2])).to_lists() == [[], []]
+    assert PropColumn.from_lists([]).to_lists() == []
+    np.testing.assert_array_equal(prop_column.contains(['a']), [False, True, False, True, False])
+
+
+def test_format_annotation_texts():
+    annotations = [
+        '',
+        'ein',
+        'ein  zwei   drei',
+        ' '.join(['wort'] * 10),
+        ' '.join(['wort'] * 11),
+        ' '.join(map(str, range(60))),
+        ' '.join(map(str, range(61))),
+        ' '.join(map(str, range(200))),
+        '  vorne und hinten  ',
+    ]
+    for text in ['1810-kohlhaas', '1807-penthesilea']:
+        annotation_df = parse_annotations(annotation_path(text), tags=['direct_speech', 'secondary_narration'])
+        annotations += list(annotation_df.annotation)
+    formatted = format_annotation_texts(pd.Series(annotations))
+    assert list(formatted) == [format_annotation_text(annotation) for annotation in annotations]
+
+
+@pytest.mark.parametrize('text', corpora['All'])
+def test_store_load(text):
+    store = AnnotationStore()
+    annotation_df = parse_annotations(annotation_path(text))
+    pd.testing.assert_frame_equal(store.load(text), annotation_df)
+    extent = annotation_df.end_point.max()
+    for mode in modes:
+        expected = annotation_df[
+            scan_window(annotation_df, 0.2 * extent, 0.6 * extent, mode)
+            & annotation_df.tag.isin(['direct_speech', 'secondary_narration'])
+        ][['tag', 'start_point', 'prop:speaker', 'prop:addressee']]
+        pd.testing.assert_frame_equal(
+            store.load(
+                text,
+                tags=['direct_speech', 'secondary_narration'],
+                columns=['tag', 'start_point', 'prop:speaker', 'prop:addressee'],
+                start_point=0.2,
+                end_point=0.6,
+                mode=mode
+            ),
+            expected
+        )
@@ -0,0 +1,71 @@
+import io
+import json
+import pytest
+import pandas as pd
+from narrview.intervals import modes
+from narrview.network import get_edge_frame, network_tags
+from narrview.store import annotation_path, corpora
+from narrview.streaming import iter_json_array, stream_edge_frame
+
+
+documents = [
+    '[]',
+    ' \n[ ]\n',
+    '[1, 23, 456, 7890]',
+    '[12345678901234567890,-1.5e10,0.25, 3]',
+    '[1.5e+10, 0.5E-3, -0, 7]',
+    '[{"a": [1, 2, {"b": "]},["}], "c": null}, "x", true, false, []]',
+    '[ "ä ß \\u00fc", "quote \\" ], [" ]',
+    '\n[\n1\n,\n{}\n]\n',
+]
+chunk_sizes = [1, 2, 3, 5, 8, 64]
+windows = [(0, 1.0), (0.2, 0.6), (0.5, 0.5)]
+
+
+@pytest.mark.parametrize('chunk_size', chunk_sizes)
+@pytest.mark.parametrize('document', documents)
+def test_iter_json_array(document, chunk_size):
+    assert list(iter_json_array(io.StringIO(document), chunk_size=chunk_size)) == json.loads(document)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 4096])
+@pytest.mark.parametrize('text', ['1810-caecilie', '1807-erdbeben'])
+def test_iter_json_array_annotation_files(text, chunk_size):
+    with open(annotation_path(text), encoding='utf-8') as json_file:
+        expected = json.load(json_file)
+    with open(annotation_path(text), encoding='utf-8') as json_file:
+        assert list(iter_json_array(json_file, chunk_size=chunk_size)) == expected
+
+
+@pytest.mark.parametrize('document', ['{"a": 1}', '1', '', '[1, 2', '[{"a": 1', '["a"'])
+def test_iter_json_array_invalid(document):
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(document), chunk_size=2))
+
+
+@pytest.mark.parametrize('network_annotations', list(network_tags))
+@pytest.mark.parametrize('text', corpora['All'])
+def test_stream_edge_frame(text, network_annotations):
+    for start_point, end_point in windows:
+        for mode in modes:
+            expected = get_edge_frame(
+                text=text,
+                network_annotations=network_annotations,
+                start_point=start_point,
+                end_point=end_point,
+                window_mode=mode
+            )
+            pd.testing.assert_frame_equal(
+                stream_edge_frame(
+                    text=text,
+                    network_annotations=network_annotations,
+                    start_point=start_point,
+                    end_point=end_point,
+                    window_mode=mode
+                ),
+                expected,
+                # the column dtypes of empty frames are not defined by their values
+                check_dtype=not expected.empty,
+                check_index_type=not expected.empty,
+                obj=f'{text} {network_annotations} {start_point}-{end_point} {mode}'
+            )